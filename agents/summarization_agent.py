@@ -247,15 +247,40 @@ class SummarizationAgent:
         logger.info(f"Summarizing batch of {len(papers)} papers")
         
         summaries = []
-        for i, paper in enumerate(papers, 1):
-            logger.info(f"Processing paper {i}/{len(papers)}")
-            summary = self.summarize_paper(paper, research_query)
-            summaries.append(summary)
+        try:
+            for i, paper in enumerate(papers, 1):
+                logger.info(f"Processing paper {i}/{len(papers)}")
+                summary = self.summarize_paper(paper, research_query)
+                summaries.append(summary)
+        finally:
+            # Release the PDF session and extraction pool between batches
+            self.close()
         
         logger.info(f"Completed summarization of {len(summaries)} papers")
         
         return summaries
     
+    def close(self):
+        """
+        Close the PDF manager's HTTP session and extraction pool
+        
+        The agent can keep being used afterwards; both are recreated on the
+        next full-text download.
+        """
+        if self.pdf_manager is None:
+            return
+        
+        try:
+            loop = asyncio.get_event_loop()
+        except RuntimeError:
+            loop = asyncio.new_event_loop()
+            asyncio.set_event_loop(loop)
+        
+        try:
+            loop.run_until_complete(self.pdf_manager.close())
+        except Exception as e:
+            logger.warning(f"Error closing PDF manager: {e}")
+    
     def extract_technical_details(self, paper: Dict) -> Dict:
         """
         Extract technical details like datasets, models, metrics
@@ -116,7 +116,7 @@ class AnalyzerAgent(BaseAgent):
         kg_stats = self.kg_builder.get_statistics()
         
         # Query interface for insights
-        kg_query = KnowledgeGraphQuery(self.kg_builder.graph)
+        kg_query = KnowledgeGraphQuery(self.kg_builder.graph, self.kg_builder)
         
         # Get trending concepts
         trending_concepts = kg_query.get_trending_concepts(top_n=10)
@@ -220,15 +220,16 @@ Equations Summary:
         # Convert DataFrames to JSON-serializable format
         serializable_result = extraction_result.copy()
         
-        for table in serializable_result['tables']:
-            # Remove DataFrame object (already have csv/json)
-            if 'dataframe' in table:
-                del table['dataframe']
+        # Drop DataFrame objects (csv/json are kept); items() also renders
+        # any lazily computed table formats while the DataFrame is present
+        serializable_result['tables'] = [
+            {key: value for key, value in table.items() if key != 'dataframe'}
+            for table in serializable_result['tables']
+        ]
         
         for figure in serializable_result['figures']:
-            # Remove PIL Image object
-            if 'image' in figure:
-                del figure['image']
+            # Remove raw image bytes
+            figure.pop('image_bytes', None)
             # Keep only path if saved
             if 'saved_path' not in figure:
                 figure['note'] = 'Image not saved'
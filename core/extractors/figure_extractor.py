@@ -1,37 +1,76 @@
 """
 Figure Extractor - Extract figures and images from PDFs with OCR
 """
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from typing import List, Dict, Optional
 import logging
-from PIL import Image
+import os
 import io
+import tempfile
+from PIL import Image
+import numpy as np
+
+from .pdf_loader import open_pdf
 
 logger = logging.getLogger(__name__)
 
 
+def _extract_one(args: tuple) -> List[Dict]:
+    """Extract figures from one PDF in a worker process"""
+    pdf_path, output_dir, init_kwargs = args
+    extractor = FigureExtractor(**init_kwargs)
+    return extractor.extract_figures(pdf_path, output_dir)
+
+
 class FigureExtractor:
     """Extract figures, images, and diagrams from PDF files"""
     
-    def __init__(self, dpi: int = 300, ocr_enabled: bool = True):
+    # Longest edge (in pixels) of the image handed to Tesseract; label text
+    # stays legible well below the 300 DPI extraction resolution
+    OCR_MAX_DIMENSION = 1600
+    
+    # Target formats MuPDF can encode directly from a pixmap
+    PIXMAP_FORMATS = {'PNG': 'png', 'JPEG': 'jpg', 'JPG': 'jpg'}
+    
+    # Embedded image encodings saved as-is; other encodings, CMYK and
+    # soft-masked images are converted to PNG through a pixmap
+    DIRECT_FORMATS = {'png', 'jpeg', 'jpg'}
+    
+    def __init__(self,
+                 dpi: int = 300,
+                 ocr_enabled: bool = True,
+                 ocr_min_std: float = 15.0,
+                 ocr_min_edge_density: float = 2.0):
         """
         Initialize figure extractor
         
         Args:
             dpi: Resolution for image extraction
             ocr_enabled: Whether to perform OCR on extracted figures
+            ocr_min_std: Grayscale standard deviation below which a figure
+                is considered textless (OCR skipped if edge density is also low)
+            ocr_min_edge_density: Mean absolute pixel gradient below which a
+                figure is considered textless (OCR skipped if std is also low)
         """
         self.dpi = dpi
         self.ocr_enabled = ocr_enabled
+        self.ocr_min_std = ocr_min_std
+        self.ocr_min_edge_density = ocr_min_edge_density
         logger.info(f"FigureExtractor initialized (DPI: {dpi}, OCR: {ocr_enabled})")
     
-    def extract_figures(self, pdf_path: Path, output_dir: Optional[Path] = None) -> List[Dict]:
+    def extract_figures(self,
+                        pdf_path: Path,
+                        output_dir: Optional[Path] = None,
+                        find_captions: bool = True) -> List[Dict]:
         """
         Extract all figures from PDF
         
         Args:
             pdf_path: Path to PDF file
             output_dir: Optional directory to save extracted images
+            find_captions: Whether to look up captions now; pass False and
+                call enrich_captions after filtering to skip discarded figures
             
         Returns:
             List of dictionaries containing figure data and metadata
@@ -45,16 +84,19 @@ class FigureExtractor:
         try:
             logger.info(f"Extracting figures from {pdf_path}")
             
-            doc = fitz.open(str(pdf_path))
             figures = []
+            seen = {}  # xref -> first figure extracted for that image
             
-            for page_num in range(len(doc)):
-                page = doc[page_num]
-                page_figures = self._extract_from_page(page, page_num + 1, output_dir)
-                figures.extend(page_figures)
+            with open_pdf(pdf_path) as doc:
+                page_count = len(doc)
+                
+                for page_num in range(page_count):
+                    page = doc[page_num]
+                    page_figures = self._extract_from_page(page, page_num + 1, output_dir,
+                                                           seen, find_captions)
+                    figures.extend(page_figures)
             
-            doc.close()
-            logger.info(f"Extracted {len(figures)} figures from {len(doc)} pages")
+            logger.info(f"Extracted {len(figures)} figures from {page_count} pages")
             
             return figures
         
@@ -62,33 +104,105 @@ class FigureExtractor:
             logger.error(f"Error extracting figures: {e}")
             return []
     
-    def _extract_from_page(self, page, page_num: int, output_dir: Optional[Path]) -> List[Dict]:
-        """Extract figures from a single page"""
+    def extract_many(self,
+                     pdf_paths: List[Path],
+                     output_dir: Optional[Path] = None,
+                     max_workers: Optional[int] = None) -> Dict[str, List[Dict]]:
+        """
+        Extract figures from many PDFs in parallel worker processes
+        
+        Args:
+            pdf_paths: Paths to PDF files
+            output_dir: Optional directory; images of each PDF are saved in
+                a subdirectory named after the PDF
+            max_workers: Number of worker processes (defaults to CPU count)
+            
+        Returns:
+            Dictionary mapping each PDF path to its list of figures
+        """
+        pdf_paths = [Path(p) for p in pdf_paths]
+        if not pdf_paths:
+            return {}
+        
+        workers = max_workers or os.cpu_count() or 1
+        chunksize = max(1, len(pdf_paths) // (4 * workers))
+        init_kwargs = {
+            'dpi': self.dpi,
+            'ocr_enabled': self.ocr_enabled,
+            'ocr_min_std': self.ocr_min_std,
+            'ocr_min_edge_density': self.ocr_min_edge_density
+        }
+        jobs = [(path, Path(output_dir) / path.stem if output_dir else None, init_kwargs)
+                for path in pdf_paths]
+        
+        logger.info(f"Extracting figures from {len(pdf_paths)} PDFs with {workers} workers")
+        
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = executor.map(_extract_one, jobs, chunksize=chunksize)
+            return {str(path): figures for path, figures in zip(pdf_paths, results)}
+    
+    def _extract_from_page(self,
+                           page,
+                           page_num: int,
+                           output_dir: Optional[Path],
+                           seen: Optional[Dict[int, Dict]] = None,
+                           find_captions: bool = True) -> List[Dict]:
+        """
+        Extract figures from a single page
+        
+        Images already extracted on an earlier page (same xref in ``seen``)
+        are not decoded or OCR'd again; the earlier figure is reused.
+        """
         import fitz
         
         figures = []
+        if seen is None:
+            seen = {}
+        
+        # Resolve per-page lookups once, outside the image loop
+        doc = page.parent
+        debug = logger.debug
         
         # Get all images on the page
         image_list = page.get_images(full=True)
         
+        # Page text is extracted at most once and shared by all captions
+        page_text = None
+        
         for img_idx, img_info in enumerate(image_list):
             try:
                 xref = img_info[0]
-                base_image = page.parent.extract_image(xref)
                 
-                image_bytes = base_image["image"]
-                image_ext = base_image["ext"]
-                
-                # Convert to PIL Image
-                image = Image.open(io.BytesIO(image_bytes))
-                
-                # Get image properties
-                width, height = image.size
+                # Get image properties from the image listing (no decode needed)
+                width, height = img_info[2], img_info[3]
                 
                 # Skip small images (likely logos or icons)
                 if width < 100 or height < 100:
                     continue
                 
+                if find_captions and page_text is None:
+                    page_text = page.get_text()
+                
+                # Reuse images repeated across pages (logos, watermarks)
+                if xref in seen:
+                    first = seen[xref]
+                    first['occurrences'] += 1
+                    figure_data = {key: value for key, value in first.items()
+                                   if key not in ('occurrences', 'caption')}
+                    figure_data.update({
+                        'figure_number': len(figures) + 1,
+                        'page': page_num,
+                        'duplicate_of_page': first['page']
+                    })
+                    if find_captions:
+                        figure_data['caption'] = self._find_caption(page_text, page_num)
+                    figures.append(figure_data)
+                    continue
+                
+                # Keep the embedded encoding (e.g. the original JPEG stream);
+                # pixels are only decoded if OCR needs them
+                image_bytes, image_ext, pix = self._encoded_image(doc, xref)
+                
                 figure_data = {
                     'figure_number': len(figures) + 1,
                     'page': page_num,
@@ -96,19 +210,21 @@ class FigureExtractor:
                     'height': height,
                     'format': image_ext,
                     'size_bytes': len(image_bytes),
-                    'image': image,
-                    'xref': xref
+                    'xref': xref,
+                    'occurrences': 1
                 }
                 
                 # Perform OCR if enabled
                 if self.ocr_enabled:
-                    ocr_text = self._perform_ocr(image)
+                    if pix is None:
+                        pix = self._decode_pixmap(doc, xref)
+                    ocr_text = self._perform_ocr(self._pixmap_to_image(pix))
                     figure_data['ocr_text'] = ocr_text
                     figure_data['has_text'] = len(ocr_text.strip()) > 0
                 
                 # Try to find caption
-                caption = self._find_caption(page, page_num)
-                figure_data['caption'] = caption
+                if find_captions:
+                    figure_data['caption'] = self._find_caption(page_text, page_num)
                 
                 # Save image if output directory provided
                 if output_dir:
@@ -117,11 +233,19 @@ class FigureExtractor:
                     
                     img_filename = f"figure_page{page_num}_{len(figures)+1}.{image_ext}"
                     img_path = output_dir / img_filename
-                    image.save(img_path)
+                    img_path.write_bytes(image_bytes)
                     figure_data['saved_path'] = str(img_path)
+                else:
+                    figure_data['image_bytes'] = image_bytes
+                
+                # Decoded pixels are released here; get_image rebuilds the
+                # image from the saved file or encoded bytes on demand
+                pix = image_bytes = None
                 
                 figures.append(figure_data)
-                logger.debug(f"Extracted figure {len(figures)} from page {page_num}: {width}x{height}")
+                seen[xref] = figure_data
+                debug(f"Extracted figure {len(figures)} from page {page_num}: "
+                      f"{width}x{height}")
             
             except Exception as e:
                 logger.warning(f"Failed to extract image {img_idx} from page {page_num}: {e}")
@@ -129,6 +253,117 @@ class FigureExtractor:
         
         return figures
     
+    def enrich_captions(self, pdf_path: Path, figures: List[Dict]) -> List[Dict]:
+        """
+        Find captions for figures extracted with find_captions=False
+        
+        Page text is only extracted for pages that still hold a figure, so
+        figures dropped by filter_figures cost nothing.
+        
+        Args:
+            pdf_path: Path to the PDF the figures were extracted from
+            figures: List of figure dictionaries (updated in place)
+            
+        Returns:
+            The same list of figures with 'caption' filled in
+        """
+        try:
+            page_texts = {}
+            
+            with open_pdf(pdf_path) as doc:
+                for page_num in sorted({figure['page'] for figure in figures}):
+                    page_texts[page_num] = doc[page_num - 1].get_text()
+            
+            for figure in figures:
+                figure['caption'] = self._find_caption(page_texts[figure['page']],
+                                                       figure['page'])
+        
+        except Exception as e:
+            logger.error(f"Error finding captions: {e}")
+        
+        return figures
+    
+    def _save_pixmap(self, pix, output_path: Path, format: str, quality: int):
+        """Encode a pixmap with MuPDF's native PNG/JPEG writers"""
+        import fitz
+        
+        output = self.PIXMAP_FORMATS[format]
+        if output == 'jpg':
+            # JPEG has no alpha channel
+            if pix.alpha:
+                pix = fitz.Pixmap(pix, 0)
+            output_path.write_bytes(pix.tobytes(output, jpg_quality=quality))
+        else:
+            pix.save(str(output_path), output=output)
+    
+    def _encoded_image(self, doc, xref: int):
+        """
+        Get an embedded image in a format that can be written as-is
+        
+        The original stream is used when it is a plain PNG/JPEG; otherwise
+        the image is decoded (CMYK to RGB, soft mask as alpha) and encoded
+        as PNG.
+        
+        Returns:
+            Tuple of (encoded bytes, format extension, decoded pixmap or None)
+        """
+        extracted = doc.extract_image(xref)
+        if (extracted['ext'] in self.DIRECT_FORMATS and not extracted.get('smask')
+                and extracted.get('colorspace', 3) <= 3):
+            return extracted['image'], extracted['ext'], None
+        
+        pix = self._decode_pixmap(doc, xref, extracted.get('smask'))
+        return pix.tobytes('png'), 'png', pix
+    
+    @staticmethod
+    def _decode_pixmap(doc, xref: int, smask: int = 0):
+        """Decode an embedded image into an RGB/gray pixmap, with its soft mask as alpha"""
+        import fitz
+        
+        pix = fitz.Pixmap(doc, xref)
+        if pix.n - pix.alpha > 3:
+            pix = fitz.Pixmap(fitz.csRGB, pix)
+        if smask and not pix.alpha:
+            pix = fitz.Pixmap(pix, fitz.Pixmap(doc, smask))
+        return pix
+    
+    @staticmethod
+    def _pixmap_to_image(pix) -> Image.Image:
+        """Wrap decoded pixmap samples in a PIL image without re-decoding"""
+        modes = {1: 'L', 3: 'RGB'}
+        mode = modes[pix.n - pix.alpha] + ('A' if pix.alpha else '')
+        return Image.frombytes(mode, (pix.width, pix.height), pix.samples)
+    
+    def get_image(self, figure_dict: Dict) -> Image.Image:
+        """
+        Get a PIL image for a figure, loading it from the encoded bytes or
+        the saved file on demand
+        
+        Pixels are decoded lazily by PIL, so reading properties such as
+        mode or size stays cheap.
+        
+        Args:
+            figure_dict: Figure dictionary from extract_figures
+            
+        Returns:
+            PIL Image of the figure
+        """
+        if figure_dict.get('image') is not None:
+            return figure_dict['image']
+        if figure_dict.get('image_bytes') is not None:
+            return Image.open(io.BytesIO(figure_dict['image_bytes']))
+        return Image.open(figure_dict['saved_path'])
+    
+    def _load_pixmap(self, figure_dict: Dict):
+        """Decode a figure's stored image into a pixmap, if one is stored"""
+        import fitz
+        
+        if figure_dict.get('image_bytes') is not None:
+            return fitz.Pixmap(figure_dict['image_bytes'])
+        if figure_dict.get('saved_path'):
+            return fitz.Pixmap(figure_dict['saved_path'])
+        return None
+    
     def _perform_ocr(self, image: Image.Image) -> str:
         """Perform OCR on image using Tesseract"""
         if not self.ocr_enabled:
@@ -137,12 +372,30 @@ class FigureExtractor:
         try:
             import pytesseract
             
+            # Cheap pre-filter: flat gradients and sparse-line figures rarely
+            # contain OCR-able glyphs, so skip Tesseract for them entirely
+            if not self._may_contain_text(image):
+                return ""
+            
+            # Downscale large figures; the caller's image is left untouched
+            if max(image.size) > self.OCR_MAX_DIMENSION:
+                image = image.copy()
+                image.thumbnail((self.OCR_MAX_DIMENSION, self.OCR_MAX_DIMENSION),
+                                Image.Resampling.LANCZOS)
+            
             # Convert to RGB if necessary
             if image.mode != 'RGB':
                 image = image.convert('RGB')
             
-            # Perform OCR
-            text = pytesseract.image_to_string(image)
+            # Hand Tesseract an uncompressed BMP file by path; given an
+            # in-memory image, pytesseract would encode it as PNG (zlib) first
+            with tempfile.NamedTemporaryFile(suffix='.bmp', delete=False) as f:
+                image.save(f, format='BMP')
+            try:
+                # Perform OCR
+                text = pytesseract.image_to_string(f.name)
+            finally:
+                os.unlink(f.name)
             return text.strip()
         
         except ImportError:
@@ -153,15 +406,29 @@ class FigureExtractor:
             logger.warning(f"OCR failed: {e}")
             return ""
     
-    def _find_caption(self, page, page_num: int) -> str:
+    def _may_contain_text(self, image: Image.Image) -> bool:
+        """Estimate whether an image could contain legible text"""
+        arr = np.asarray(image.convert('L'), dtype=np.int16)
+        if arr.ndim != 2 or min(arr.shape) < 2:
+            return False
+        
+        std = float(arr.std())
+        edge_density = float(np.abs(np.diff(arr, axis=0)).mean() +
+                             np.abs(np.diff(arr, axis=1)).mean())
+        
+        if std < self.ocr_min_std and edge_density < self.ocr_min_edge_density:
+            logger.debug(f"Skipping OCR (std={std:.1f}, edges={edge_density:.2f})")
+            return False
+        return True
+    
+    def _find_caption(self, page_text: str, page_num: int) -> str:
         """
-        Try to find figure caption on the page
+        Try to find figure caption in the text of a page
         
         This is a simple heuristic - looks for text containing 'Figure' or 'Fig.'
         """
         try:
-            text = page.get_text()
-            lines = text.split('\n')
+            lines = page_text.split('\n')
             
             # Look for lines starting with "Figure" or "Fig."
             for i, line in enumerate(lines):
@@ -194,7 +461,7 @@ class FigureExtractor:
         Returns:
             Analysis results
         """
-        image = figure_dict['image']
+        image = self.get_image(figure_dict)
         
         analysis = {
             'width': figure_dict['width'],
@@ -285,16 +552,24 @@ class FigureExtractor:
             quality: Quality for lossy formats (1-100)
         """
         try:
-            image = figure_dict['image']
+            output_path = Path(output_path)
+            output_path.parent.mkdir(parents=True, exist_ok=True)
+            
+            # PNG and JPEG are encoded straight from a pixmap by MuPDF
+            if format.upper() in self.PIXMAP_FORMATS and figure_dict.get('image') is None:
+                pix = self._load_pixmap(figure_dict)
+                if pix is not None:
+                    self._save_pixmap(pix, output_path, format.upper(), quality)
+                    logger.info(f"Converted figure to {format} at {output_path}")
+                    return
+            
+            image = self.get_image(figure_dict)
             
             # Convert mode if necessary
             if format.upper() == 'JPEG' and image.mode in ['RGBA', 'LA', 'P']:
                 image = image.convert('RGB')
             
             # Save with specified format
-            output_path = Path(output_path)
-            output_path.parent.mkdir(parents=True, exist_ok=True)
-            
             if format.upper() in ['JPEG', 'JPG']:
                 image.save(output_path, format='JPEG', quality=quality, optimize=True)
             else:
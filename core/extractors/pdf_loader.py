@@ -0,0 +1,49 @@
+"""
+PDF Loader - Open PDFs for the extractors from a memory-mapped file
+"""
+from contextlib import contextmanager
+from pathlib import Path
+import logging
+import mmap
+
+logger = logging.getLogger(__name__)
+
+
+@contextmanager
+def open_pdf(pdf_path: Path):
+    """
+    Open a PDF with PyMuPDF backed by a read-only memory map of the file
+    
+    Pages are faulted in by the kernel on first access instead of being
+    read through buffered file I/O. The mapping stays alive for as long as
+    the document is open.
+    
+    Args:
+        pdf_path: Path to PDF file
+        
+    Yields:
+        Open ``fitz.Document``, closed when the context exits
+    """
+    import fitz  # PyMuPDF
+    
+    with open(pdf_path, 'rb') as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    
+    try:
+        try:
+            doc = fitz.open(stream=mm, filetype='pdf')
+        except TypeError:
+            # Older PyMuPDF releases only accept bytes/BytesIO streams
+            logger.debug("PyMuPDF rejected mmap stream, opening by path")
+            doc = fitz.open(str(pdf_path))
+        
+        try:
+            yield doc
+        finally:
+            doc.close()
+    finally:
+        try:
+            mm.close()
+        except BufferError:
+            # PyMuPDF still holds a view; the mapping is released with it
+            pass
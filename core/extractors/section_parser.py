@@ -5,9 +5,35 @@ from pathlib import Path
 from typing import List, Dict, Optional
 import logging
 import re
+import statistics
+
+from .pdf_loader import open_pdf
 
 logger = logging.getLogger(__name__)
 
+# Patterns used for every candidate header line, compiled once
+_LEADING_NUMBER_RE = re.compile(r'^\d+\.?\s*')
+_PUNCTUATION_RE = re.compile(r'[^\w\s]')
+_NUMBERED_SECTION_RE = re.compile(r'^\d+\.?\s+[a-z\s]+$')
+_LINE_RE = re.compile(r'^.*$', re.MULTILINE)
+_SUBSECTION_RE = re.compile(r'^(\d+\.)+\d+\s+([A-Z][^\n]+)$')
+
+
+def _build_header_matcher(common_sections: Dict[str, List[str]]):
+    """
+    Flatten section keywords into one prefix regex and a keyword lookup
+
+    Alternatives keep the declaration order of ``common_sections``, so the
+    first keyword that prefixes a line wins, exactly as a nested scan would.
+    """
+    keyword_to_section = {}
+    for section_type, keywords in common_sections.items():
+        for keyword in keywords:
+            keyword_to_section.setdefault(keyword, section_type)
+    
+    alternation = '|'.join(re.escape(keyword) for keyword in keyword_to_section)
+    return re.compile(f'^({alternation})'), keyword_to_section
+
 
 class SectionParser:
     """Parse structured sections from research papers"""
@@ -26,8 +52,22 @@ class SectionParser:
         'acknowledgments': ['acknowledgments', 'acknowledgements']
     }
     
+    # Sections inspected by analyze_structure, and those a well-structured
+    # paper must contain
+    STRUCTURE_SECTIONS = frozenset({'abstract', 'introduction', 'methodology', 'results',
+                                    'experiments', 'conclusion', 'references'})
+    REQUIRED_SECTIONS = frozenset({'abstract', 'introduction', 'conclusion'})
+    
+    # A line is a heading candidate if its font is this much larger than the
+    # document's median body size, or if it is set entirely in bold
+    HEADING_SIZE_RATIO = 1.2
+    BOLD_FLAG = 16
+    
     def __init__(self):
         """Initialize section parser"""
+        # Specialise header matching for this parser's COMMON_SECTIONS once,
+        # so subclasses overriding the table get their own matcher
+        self._header_re, self._keyword_to_section = _build_header_matcher(self.COMMON_SECTIONS)
         logger.info("SectionParser initialized")
     
     def parse_sections(self, pdf_path: Path) -> Dict[str, str]:
@@ -49,19 +89,19 @@ class SectionParser:
         try:
             logger.info(f"Parsing sections from {pdf_path}")
             
-            doc = fitz.open(str(pdf_path))
-            
-            # Extract full text with page markers
-            full_text = ""
-            for page_num in range(len(doc)):
-                page = doc[page_num]
-                text = page.get_text()
-                full_text += f"\n\n--- PAGE {page_num + 1} ---\n\n{text}"
+            # Extract styled lines per page
+            with open_pdf(pdf_path) as doc:
+                pages, median_size = self._extract_styled_lines(doc)
             
-            doc.close()
+            # Only headings (large or bold lines) are tested against the
+            # section keywords
+            heading_size = median_size * self.HEADING_SIZE_RATIO
+            sections = self._collect_sections(self._tag_styled_lines(pages, heading_size))
             
-            # Parse sections
-            sections = self._parse_text_into_sections(full_text)
+            # Fall back to keyword scanning of every line when the layout
+            # carries no usable heading styles
+            if not sections:
+                sections = self._parse_text_into_sections(self._join_pages(pages))
             
             logger.info(f"Found {len(sections)} sections")
             return sections
@@ -70,74 +110,129 @@ class SectionParser:
             logger.error(f"Error parsing sections: {e}")
             return {}
     
-    def _parse_text_into_sections(self, text: str) -> Dict[str, str]:
-        """Parse text into sections based on headers"""
-        sections = {}
-        
-        # Find all section boundaries
-        boundaries = self._find_section_boundaries(text)
+    def _extract_styled_lines(self, doc) -> tuple:
+        """
+        Collect text lines with their font size and weight from every page
         
-        if not boundaries:
-            logger.warning("No section boundaries found, treating as single document")
-            return {'full_text': text}
+        Returns:
+            Tuple of (per-page lists of (text, size, is_bold), median font size)
+        """
+        pages = []
+        sizes = []
         
-        # Extract content between boundaries
-        for i, (section_name, start_pos) in enumerate(boundaries):
-            # Get end position (start of next section or end of text)
-            end_pos = boundaries[i + 1][1] if i + 1 < len(boundaries) else len(text)
-            
-            # Extract content
-            content = text[start_pos:end_pos].strip()
+        for page_num in range(len(doc)):
+            page = doc[page_num]
+            lines = []
             
-            # Remove the section header from content
-            lines = content.split('\n')
-            if lines:
-                lines = lines[1:]  # Skip header line
-            content = '\n'.join(lines).strip()
+            for block in page.get_text("dict")["blocks"]:
+                if block.get("type") != 0:  # Skip image blocks
+                    continue
+                
+                for line in block["lines"]:
+                    spans = [span for span in line["spans"] if span["text"].strip()]
+                    if not spans:
+                        continue
+                    
+                    text = ''.join(span["text"] for span in line["spans"])
+                    size = max(span["size"] for span in spans)
+                    is_bold = all(span["flags"] & self.BOLD_FLAG for span in spans)
+                    
+                    lines.append((text, size, is_bold))
+                    sizes.append(size)
             
-            sections[section_name] = content
+            pages.append(lines)
         
-        return sections
+        median_size = statistics.median(sizes) if sizes else 0.0
+        return pages, median_size
     
-    def _find_section_boundaries(self, text: str) -> List[tuple]:
-        """Find section boundaries in text"""
-        boundaries = []
-        lines = text.split('\n')
-        
-        for i, line in enumerate(lines):
-            line_clean = line.strip().lower()
-            
-            if not line_clean:
-                continue
+    def _page_marker_lines(self, page_num: int) -> tuple:
+        """Lines of the marker that precedes each page's text"""
+        return ('', '', f'--- PAGE {page_num} ---', '')
+    
+    def _join_pages(self, pages: List[list]) -> str:
+        """Join styled lines into full text with page markers"""
+        parts = []
+        for page_num, lines in enumerate(pages, start=1):
+            parts.extend(self._page_marker_lines(page_num))
+            parts.extend(text for text, _, _ in lines)
+        parts.append('')
+        return '\n'.join(parts)
+    
+    def _tag_styled_lines(self, pages: List[list], heading_size: float):
+        """Yield (line, section_name or None) for styled lines with page markers"""
+        for page_num, lines in enumerate(pages, start=1):
+            for marker_line in self._page_marker_lines(page_num):
+                yield marker_line, None
             
-            # Check if line matches any section header
-            section_name = self._identify_section(line_clean)
+            for text, size, is_bold in lines:
+                section_name = None
+                if size >= heading_size or is_bold:
+                    section_name = self._identify_section(text.strip().lower())
+                    if section_name:
+                        logger.debug(f"Found heading '{section_name}' on page {page_num}")
+                yield text, section_name
+    
+    def _tag_text_lines(self, text: str):
+        """Yield (line, section_name or None) for every line of text"""
+        # Iterate line matches over the original string; no list of lines
+        # is materialised
+        for i, match in enumerate(_LINE_RE.finditer(text)):
+            line = match.group(0)
+            line_clean = line.strip().lower()
             
+            section_name = self._identify_section(line_clean) if line_clean else None
             if section_name:
-                # Get position in original text
-                pos = text.find(line)
-                boundaries.append((section_name, pos))
                 logger.debug(f"Found section '{section_name}' at line {i}")
+            yield line, section_name
+    
+    def _collect_sections(self, tagged_lines) -> Dict[str, str]:
+        """
+        Group tagged lines into sections in a single streaming pass
         
-        # Sort by position
-        boundaries.sort(key=lambda x: x[1])
+        Header lines start a new section and are not part of its content;
+        lines before the first header are dropped.
+        """
+        sections = {}
+        current_section = None
+        current_lines = []
         
-        return boundaries
+        for line, section_name in tagged_lines:
+            if section_name:
+                if current_section:
+                    sections[current_section] = '\n'.join(current_lines).strip()
+                current_section = section_name
+                current_lines = []
+            elif current_section:
+                current_lines.append(line)
+        
+        if current_section:
+            sections[current_section] = '\n'.join(current_lines).strip()
+        
+        return sections
+    
+    def _parse_text_into_sections(self, text: str) -> Dict[str, str]:
+        """Parse text into sections based on headers"""
+        sections = self._collect_sections(self._tag_text_lines(text))
+        
+        if not sections:
+            logger.warning("No section boundaries found, treating as single document")
+            return {'full_text': text}
+        
+        return sections
     
     def _identify_section(self, line: str) -> Optional[str]:
         """Identify if line is a section header"""
         # Remove numbers and special characters
-        line_clean = re.sub(r'^\d+\.?\s*', '', line)
-        line_clean = re.sub(r'[^\w\s]', '', line_clean).strip()
+        line_clean = _LEADING_NUMBER_RE.sub('', line)
+        line_clean = _PUNCTUATION_RE.sub('', line_clean).strip()
         
         # Check against known sections
-        for section_type, keywords in self.COMMON_SECTIONS.items():
-            for keyword in keywords:
-                if line_clean == keyword or line_clean.startswith(keyword):
-                    return section_type
+        match = self._header_re.match(line_clean)
+        if match:
+            return self._keyword_to_section[match.group(1)]
         
         # Check for numbered sections (e.g., "1. Introduction")
-        if re.match(r'^\d+\.?\s+[a-z\s]+$', line):
+        if _NUMBERED_SECTION_RE.match(line):
             return 'numbered_section'
         
         return None
@@ -187,15 +282,34 @@ class SectionParser:
         Returns:
             Statistics dictionary
         """
+        total_words = 0
+        total_characters = 0
+        section_word_counts = {}
+        longest_section = shortest_section = None
+        longest_length = shortest_length = None
+        
+        # Single pass over the sections, splitting each one only once
+        for name, content in sections.items():
+            length = len(content)
+            word_count = len(content.split())
+            
+            total_words += word_count
+            total_characters += length
+            section_word_counts[name] = word_count
+            
+            if longest_length is None or length > longest_length:
+                longest_section, longest_length = name, length
+            if shortest_length is None or length < shortest_length:
+                shortest_section, shortest_length = name, length
+        
         stats = {
             'total_sections': len(sections),
-            'total_words': sum(len(content.split()) for content in sections.values()),
-            'total_characters': sum(len(content) for content in sections.values()),
+            'total_words': total_words,
+            'total_characters': total_characters,
             'sections_found': list(sections.keys()),
-            'section_word_counts': {name: len(content.split()) 
-                                   for name, content in sections.items()},
-            'longest_section': max(sections.items(), key=lambda x: len(x[1]))[0] if sections else None,
-            'shortest_section': min(sections.items(), key=lambda x: len(x[1]))[0] if sections else None
+            'section_word_counts': section_word_counts,
+            'longest_section': longest_section,
+            'shortest_section': shortest_section
         }
         
         return stats
@@ -210,23 +324,24 @@ class SectionParser:
         Returns:
             Structure analysis
         """
+        present = sections.keys() & self.STRUCTURE_SECTIONS
+        
         analysis = {
-            'has_abstract': 'abstract' in sections,
-            'has_introduction': 'introduction' in sections,
-            'has_methodology': 'methodology' in sections,
-            'has_results': 'results' in sections or 'experiments' in sections,
-            'has_conclusion': 'conclusion' in sections,
-            'has_references': 'references' in sections,
-            'section_order': list(sections.keys()),
-            'is_well_structured': self._check_well_structured(sections)
+            'has_abstract': 'abstract' in present,
+            'has_introduction': 'introduction' in present,
+            'has_methodology': 'methodology' in present,
+            'has_results': 'results' in present or 'experiments' in present,
+            'has_conclusion': 'conclusion' in present,
+            'has_references': 'references' in present,
+            'section_order': list(sections),
+            'is_well_structured': self.REQUIRED_SECTIONS <= present
         }
         
         return analysis
     
     def _check_well_structured(self, sections: Dict[str, str]) -> bool:
         """Check if document follows typical research paper structure"""
-        required_sections = ['abstract', 'introduction', 'conclusion']
-        return all(section in sections for section in required_sections)
+        return self.REQUIRED_SECTIONS <= sections.keys()
     
     def extract_subsections(self, section_text: str) -> Dict[str, str]:
         """
@@ -240,31 +355,26 @@ class SectionParser:
         """
         subsections = {}
         
-        # Pattern for subsection headers (e.g., "3.1 Dataset", "3.1.1 Preprocessing")
-        pattern = r'^(\d+\.)+\d+\s+([A-Z][^\n]+)$'
-        
-        lines = section_text.split('\n')
+        # Subsection headers look like "3.1 Dataset", "3.1.1 Preprocessing"
         current_subsection = None
-        current_content = []
+        content_start = 0
         
-        for line in lines:
-            match = re.match(pattern, line.strip())
+        for line_match in _LINE_RE.finditer(section_text):
+            match = _SUBSECTION_RE.match(line_match.group(0).strip())
             
             if match:
                 # Save previous subsection
                 if current_subsection:
-                    subsections[current_subsection] = '\n'.join(current_content).strip()
+                    subsections[current_subsection] = \
+                        section_text[content_start:line_match.start()].strip()
                 
-                # Start new subsection
+                # Start new subsection after the header line
                 current_subsection = match.group(2).strip()
-                current_content = []
-            else:
-                if current_subsection:
-                    current_content.append(line)
+                content_start = line_match.end()
         
         # Save last subsection
         if current_subsection:
-            subsections[current_subsection] = '\n'.join(current_content).strip()
+            subsections[current_subsection] = section_text[content_start:].strip()
         
         return subsections
     
@@ -1,31 +1,139 @@
 """
 Table Extractor - Extract tables from PDFs using Camelot
 """
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from pathlib import Path
-from typing import List, Dict, Optional
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+import gc
+import hashlib
 import logging
+import os
+import pickle
 import pandas as pd
 
 logger = logging.getLogger(__name__)
 
 
+class TableResult(dict):
+    """
+    Table dictionary whose text serializations are computed on first access
+    
+    Keys listed in ``serializers`` (e.g. 'csv', 'markdown') are produced from
+    the 'dataframe' entry the first time they are read and then cached, so
+    callers that only use the DataFrame never pay for them. Iteration,
+    ``items()`` and copying materialize every key, so JSON export and other
+    whole-dict consumers see the same content as a plain dict.
+    """
+    
+    def __init__(self, data=(), serializers: Optional[Dict[str, Callable]] = None):
+        super().__init__(data)
+        self._serializers = serializers or {}
+    
+    def __missing__(self, key):
+        if key in self._serializers and dict.__contains__(self, 'dataframe'):
+            value = self._serializers[key](dict.__getitem__(self, 'dataframe'))
+            self[key] = value
+            return value
+        raise KeyError(key)
+    
+    def __contains__(self, key):
+        return dict.__contains__(self, key) or (
+            key in self._serializers and dict.__contains__(self, 'dataframe'))
+    
+    def __reduce__(self):
+        # Pickle without forcing the lazy serializations
+        return (self.__class__, (dict(dict.items(self)), self._serializers))
+    
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+    
+    def _materialize(self):
+        for key in self._serializers:
+            self.get(key)
+    
+    def __iter__(self):
+        self._materialize()
+        return dict.__iter__(self)
+    
+    def _pending(self) -> List[str]:
+        """Lazy keys that have not been computed yet"""
+        if not dict.__contains__(self, 'dataframe'):
+            return []
+        return [key for key in self._serializers if not dict.__contains__(self, key)]
+    
+    def __len__(self):
+        # Count the lazy keys without producing them
+        return dict.__len__(self) + len(self._pending())
+    
+    def __bool__(self):
+        return dict.__len__(self) > 0
+    
+    def keys(self):
+        self._materialize()
+        return dict.keys(self)
+    
+    def values(self):
+        self._materialize()
+        return dict.values(self)
+    
+    def items(self):
+        self._materialize()
+        return dict.items(self)
+    
+    def copy(self):
+        self._materialize()
+        return TableResult(dict.items(self), self._serializers)
+
+
+def _extract_with_flavor(pdf_path: Path, pages: str, init_kwargs: Dict, extract_kwargs: Dict) -> List[Dict]:
+    """Run one Camelot flavor in a worker process"""
+    return TableExtractor(**init_kwargs).extract_tables(pdf_path, pages, **extract_kwargs)
+
+
 class TableExtractor:
     """Extract tables from PDF files using Camelot"""
     
-    def __init__(self, flavor: str = 'lattice'):
+    # Threads used by save_tables for concurrent file writes, and the number
+    # of tables whose CSV/Markdown files share one write task
+    SAVE_WORKERS = 8
+    SAVE_BATCH_TABLES = 8
+    
+    # Pages below these counts are skipped before Camelot runs: lattice
+    # needs ruling lines, stream needs roughly 20 words of text
+    MIN_RULING_LINES = 4
+    MIN_PAGE_CHARS = 100
+    
+    def __init__(self,
+                 flavor: str = 'lattice',
+                 cache_dir: Optional[Path] = None,
+                 pretty_markdown: bool = False):
         """
         Initialize table extractor
         
         Args:
             flavor: Extraction method ('lattice' for bordered tables, 'stream' for borderless)
+            cache_dir: Directory for cached extraction results keyed by file
+                content and every option that affects them (e.g.
+                ~/.cache/ara/tables); None (default) disables the cache
+            pretty_markdown: Render Markdown with pandas/tabulate (aligned,
+                padded columns) instead of the faster plain pipe table
         """
         self.flavor = flavor
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        self.pretty_markdown = pretty_markdown
         logger.info(f"TableExtractor initialized with flavor: {flavor}")
     
     def extract_tables(self, 
                       pdf_path: Path, 
                       pages: str = 'all',
-                      min_accuracy: float = 80.0) -> List[Dict]:
+                      min_accuracy: float = 80.0,
+                      chunk_size: int = 50,
+                      skip_empty_pages: bool = True,
+                      force_refresh: bool = False) -> List[Dict]:
         """
         Extract tables from PDF
         
@@ -33,65 +141,265 @@ class TableExtractor:
             pdf_path: Path to PDF file
             pages: Pages to extract from ('all', '1', '1,2,3', '1-5')
             min_accuracy: Minimum accuracy threshold (0-100)
+            chunk_size: Number of pages handed to Camelot per call; Camelot
+                keeps every parsed page in memory, so this bounds peak usage
+            skip_empty_pages: Pre-scan pages with pdfplumber and only hand
+                Camelot the pages that show table evidence (ruling lines for
+                lattice, enough text for stream)
+            force_refresh: Ignore any cached result and re-run Camelot
             
         Returns:
             List of dictionaries containing table data and metadata
         """
+        cache_path = self._cache_path(pdf_path, pages, min_accuracy, skip_empty_pages)
+        if cache_path is not None and not force_refresh:
+            cached_tables = self._load_cached_tables(cache_path)
+            if cached_tables is not None:
+                logger.info(f"Loaded {len(cached_tables)} cached tables for {pdf_path} ({self.flavor})")
+                return cached_tables
+        
+        camelot = self._import_camelot()
+        if camelot is None:
+            return []
+        
+        try:
+            extracted_tables = list(self._iter_camelot_tables(
+                camelot, pdf_path, pages, min_accuracy, chunk_size, skip_empty_pages))
+        except Exception as e:
+            logger.error(f"Error extracting tables: {e}")
+            return []
+        
+        if cache_path is not None:
+            self._store_cached_tables(cache_path, extracted_tables)
+        return extracted_tables
+    
+    def iter_tables(self,
+                    pdf_path: Path,
+                    pages: str = 'all',
+                    min_accuracy: float = 80.0,
+                    chunk_size: int = 50,
+                    skip_empty_pages: bool = True,
+                    force_refresh: bool = False) -> Iterator[Dict]:
+        """
+        Yield tables from PDF one at a time
+        
+        Unlike extract_tables, only the current page chunk's tables are held
+        in memory, so callers that consume tables as they arrive (e.g.
+        save_tables) can process arbitrarily large PDFs. Cached results are
+        reused, but nothing is written to the cache since the full list is
+        never assembled.
+        
+        Args:
+            pdf_path: Path to PDF file
+            pages: Pages to extract from ('all', '1', '1,2,3', '1-5')
+            min_accuracy: Minimum accuracy threshold (0-100)
+            chunk_size: Number of pages handed to Camelot per call
+            skip_empty_pages: Skip pages without table evidence
+            force_refresh: Ignore any cached result and re-run Camelot
+            
+        Yields:
+            Table dictionaries, in page order
+        """
+        cache_path = self._cache_path(pdf_path, pages, min_accuracy, skip_empty_pages)
+        if cache_path is not None and not force_refresh:
+            cached_tables = self._load_cached_tables(cache_path)
+            if cached_tables is not None:
+                yield from cached_tables
+                return
+        
+        camelot = self._import_camelot()
+        if camelot is None:
+            return
+        
+        try:
+            yield from self._iter_camelot_tables(
+                camelot, pdf_path, pages, min_accuracy, chunk_size, skip_empty_pages)
+        except Exception as e:
+            logger.error(f"Error extracting tables: {e}")
+    
+    def _import_camelot(self):
+        """Import Camelot, logging install hints if it is missing"""
         try:
             import camelot
-        except ImportError as e:
+            return camelot
+        except ImportError:
             logger.error("Camelot not installed. Install with: pip install camelot-py[cv]")
             logger.error("Also requires: pip install ghostscript opencv-python")
-            return []
+            return None
+    
+    def _iter_camelot_tables(self,
+                             camelot,
+                             pdf_path: Path,
+                             pages: str,
+                             min_accuracy: float,
+                             chunk_size: int,
+                             skip_empty_pages: bool) -> Iterator[Dict]:
+        """Run Camelot chunk by chunk and yield accepted tables"""
+        logger.info(f"Extracting tables from {pdf_path} (pages: {pages}, flavor: {self.flavor})")
         
-        try:
-            logger.info(f"Extracting tables from {pdf_path} (pages: {pages}, flavor: {self.flavor})")
-            
+        table_count = 0
+        
+        page_chunks = self._page_chunks(pdf_path, pages, chunk_size, skip_empty_pages)
+        if not page_chunks:
+            logger.info("No pages with table evidence, skipping Camelot")
+        
+        for page_chunk in page_chunks:
             # Extract tables using Camelot
             tables = camelot.read_pdf(
                 str(pdf_path),
-                pages=pages,
+                pages=page_chunk,
                 flavor=self.flavor,
                 suppress_stdout=True
             )
             
-            logger.info(f"Found {len(tables)} tables")
-            
             # Process tables
-            extracted_tables = []
-            for i, table in enumerate(tables):
-                # Check accuracy
-                accuracy = table.parsing_report.get('accuracy', 0)
-                
-                if accuracy < min_accuracy:
-                    logger.debug(f"Table {i+1} accuracy {accuracy:.2f}% below threshold {min_accuracy}%")
-                    continue
-                
-                # Convert to pandas DataFrame
-                df = table.df
-                
-                # Get table metadata
-                table_data = {
-                    'table_number': i + 1,
-                    'page': table.page,
-                    'accuracy': accuracy,
-                    'dataframe': df,
-                    'shape': df.shape,
-                    'whitespace': table.parsing_report.get('whitespace', 0),
-                    'text': self._table_to_text(df),
-                    'csv': df.to_csv(index=False),
-                    'json': df.to_json(orient='records'),
-                    'markdown': self._table_to_markdown(df)
-                }
-                
-                extracted_tables.append(table_data)
-                logger.info(f"Extracted table {i+1} (page {table.page}): {df.shape} - accuracy: {accuracy:.2f}%")
+            for table in tables:
+                table_count += 1
+                table_data = self._process_table(table, table_count, min_accuracy)
+                if table_data is not None:
+                    yield table_data
             
-            return extracted_tables
+            # Release Camelot's per-page state before the next chunk
+            del tables
+            gc.collect()
+        
+        logger.info(f"Found {table_count} tables")
+    
+    def _cache_path(self,
+                    pdf_path: Path,
+                    pages: str,
+                    min_accuracy: float,
+                    skip_empty_pages: bool) -> Optional[Path]:
+        """Cache file for this PDF's content and the options that shape its tables"""
+        if self.cache_dir is None:
+            return None
+        
+        try:
+            file_hash = hashlib.blake2b(digest_size=16)
+            with open(pdf_path, 'rb') as f:
+                for block in iter(lambda: f.read(1 << 20), b''):
+                    file_hash.update(block)
+        except OSError as e:
+            logger.debug(f"Could not hash {pdf_path} for table cache: {e}")
+            return None
         
+        # Cached tables render Markdown with the extractor that stored them
+        key = (f"{file_hash.hexdigest()}:{self.flavor}:{pages}:{min_accuracy}:"
+               f"{skip_empty_pages}:{self.pretty_markdown}")
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).hexdigest()
+        return self.cache_dir / f"{digest}.pkl"
+    
+    def _load_cached_tables(self, cache_path: Path) -> Optional[List[Dict]]:
+        """Load pickled tables, or None on a miss or unreadable entry"""
+        if not cache_path.exists():
+            return None
+        try:
+            with open(cache_path, 'rb') as f:
+                return pickle.load(f)
         except Exception as e:
-            logger.error(f"Error extracting tables: {e}")
-            return []
+            logger.warning(f"Ignoring unreadable table cache {cache_path}: {e}")
+            return None
+    
+    def _store_cached_tables(self, cache_path: Path, tables: List[Dict]):
+        """Pickle tables atomically so concurrent readers never see partial files"""
+        tmp_path = cache_path.with_suffix(f'.{os.getpid()}.tmp')
+        try:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(tables, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, cache_path)
+        except Exception as e:
+            logger.warning(f"Could not write table cache {cache_path}: {e}")
+            tmp_path.unlink(missing_ok=True)
+    
+    def _process_table(self, table, table_number: int, min_accuracy: float) -> Optional[Dict]:
+        """Convert a Camelot table to a table dictionary, or None if inaccurate"""
+        # Check accuracy
+        accuracy = table.parsing_report.get('accuracy', 0)
+        
+        if accuracy < min_accuracy:
+            logger.debug(f"Table {table_number} accuracy {accuracy:.2f}% below threshold {min_accuracy}%")
+            return None
+        
+        # Convert to pandas DataFrame
+        df = table.df
+        
+        # Get table metadata; text, csv, json and markdown are produced lazily
+        table_data = TableResult({
+            'table_number': table_number,
+            'page': table.page,
+            'accuracy': accuracy,
+            'dataframe': df,
+            'shape': df.shape,
+            'whitespace': table.parsing_report.get('whitespace', 0),
+            'bbox': getattr(table, '_bbox', None)
+        }, serializers=self._serializers())
+        
+        logger.info(f"Extracted table {table_number} (page {table.page}): {df.shape} - accuracy: {accuracy:.2f}%")
+        return table_data
+    
+    def _page_chunks(self,
+                     pdf_path: Path,
+                     pages: str,
+                     chunk_size: int,
+                     skip_empty_pages: bool = False) -> List[str]:
+        """Split a Camelot page specification into chunks of explicit page lists"""
+        try:
+            from pypdf import PdfReader
+            page_count = len(PdfReader(str(pdf_path)).pages)
+        except Exception as e:
+            logger.debug(f"Could not count pages, extracting in one pass: {e}")
+            return [pages]
+        
+        page_numbers = self._expand_pages(pages, page_count)
+        if skip_empty_pages:
+            page_numbers = self._pages_with_table_evidence(pdf_path, page_numbers)
+        return [','.join(map(str, page_numbers[start:start + chunk_size]))
+                for start in range(0, len(page_numbers), max(1, chunk_size))]
+    
+    def _pages_with_table_evidence(self, pdf_path: Path, page_numbers: List[int]) -> List[int]:
+        """Keep only pages that could hold a table for the current flavor"""
+        try:
+            import pdfplumber
+        except ImportError:
+            return page_numbers
+        
+        try:
+            candidates = []
+            with pdfplumber.open(str(pdf_path)) as pdf:
+                for page_number in page_numbers:
+                    page = pdf.pages[page_number - 1]
+                    if self.flavor == 'lattice':
+                        # Bordered tables need ruling lines or cell rectangles
+                        has_evidence = len(page.lines) + len(page.rects) > self.MIN_RULING_LINES
+                    else:
+                        has_evidence = len(page.chars) > self.MIN_PAGE_CHARS
+                    if has_evidence:
+                        candidates.append(page_number)
+                    page.flush_cache()
+        except Exception as e:
+            logger.debug(f"Could not pre-scan pages, extracting all: {e}")
+            return page_numbers
+        
+        logger.debug(f"{len(candidates)}/{len(page_numbers)} pages show table evidence")
+        return candidates
+    
+    def _expand_pages(self, pages: str, page_count: int) -> List[int]:
+        """Expand 'all', '1,3', '2-5' or '4-end' into sorted 1-based page numbers"""
+        if pages.strip().lower() == 'all':
+            return list(range(1, page_count + 1))
+        
+        page_numbers = set()
+        for part in pages.split(','):
+            part = part.strip().lower()
+            if '-' in part:
+                first, last = part.split('-', 1)
+                last_page = page_count if last == 'end' else int(last)
+                page_numbers.update(range(int(first), min(last_page, page_count) + 1))
+            elif part:
+                page_numbers.add(int(part))
+        
+        return sorted(p for p in page_numbers if 1 <= p <= page_count)
     
     def extract_tables_stream(self, pdf_path: Path, pages: str = 'all') -> List[Dict]:
         """
@@ -111,77 +419,239 @@ class TableExtractor:
         finally:
             self.flavor = old_flavor
     
-    def extract_tables_auto(self, pdf_path: Path, pages: str = 'all') -> List[Dict]:
+    def extract_tables_auto(self,
+                            pdf_path: Path,
+                            pages: str = 'all',
+                            iou_threshold: float = 0.6,
+                            min_accuracy: float = 80.0,
+                            chunk_size: int = 50,
+                            skip_empty_pages: bool = True,
+                            force_refresh: bool = False) -> List[Dict]:
         """
         Automatically try both lattice and stream flavors
         
         Args:
             pdf_path: Path to PDF file
             pages: Pages to extract from
+            iou_threshold: Stream tables overlapping a lattice table on the
+                same page by at least this bounding-box IoU are dropped
+            min_accuracy: Minimum accuracy threshold (0-100)
+            chunk_size: Number of pages handed to Camelot per call
+            skip_empty_pages: Skip pages without table evidence
+            force_refresh: Ignore any cached result and re-run Camelot
             
         Returns:
             Combined list of tables from both methods
         """
         logger.info("Extracting tables with auto mode (lattice + stream)")
         
-        # Try lattice first (works better for bordered tables)
-        lattice_tables = self.extract_tables(pdf_path, pages)
+        # Each flavor runs in an extractor configured like this one
+        lattice_kwargs = {**self._init_kwargs(), 'flavor': 'lattice'}
+        stream_kwargs = {**self._init_kwargs(), 'flavor': 'stream'}
+        extract_kwargs = {
+            'min_accuracy': min_accuracy,
+            'chunk_size': chunk_size,
+            'skip_empty_pages': skip_empty_pages,
+            'force_refresh': force_refresh
+        }
         
-        # Try stream (works better for borderless tables)
-        stream_tables = self.extract_tables_stream(pdf_path, pages)
+        # Lattice works better for bordered tables, stream for borderless ones.
+        # Both are independent Camelot runs; Ghostscript is not thread-safe,
+        # so they run side by side in separate processes
+        try:
+            with ProcessPoolExecutor(max_workers=2) as executor:
+                lattice_future = executor.submit(_extract_with_flavor, pdf_path, pages,
+                                                 lattice_kwargs, extract_kwargs)
+                stream_future = executor.submit(_extract_with_flavor, pdf_path, pages,
+                                                stream_kwargs, extract_kwargs)
+                lattice_tables = lattice_future.result()
+                stream_tables = stream_future.result()
+        except Exception as e:
+            logger.warning(f"Parallel table extraction failed, running sequentially: {e}")
+            lattice_tables = _extract_with_flavor(pdf_path, pages, lattice_kwargs, extract_kwargs)
+            stream_tables = _extract_with_flavor(pdf_path, pages, stream_kwargs, extract_kwargs)
         
         # Combine results (deduplicate by page and position)
-        all_tables = lattice_tables + stream_tables
+        lattice_boxes = {}
+        for table in lattice_tables:
+            if table.get('bbox') is not None:
+                lattice_boxes.setdefault(table['page'], []).append(table['bbox'])
+        
+        unique_stream_tables = []
+        for table in stream_tables:
+            bbox = table.get('bbox')
+            boxes = lattice_boxes.get(table['page'], [])
+            if bbox is not None and any(self._bbox_iou(bbox, other) >= iou_threshold
+                                        for other in boxes):
+                logger.debug(f"Dropping stream table {table['table_number']} on page "
+                             f"{table['page']}: duplicates a lattice table")
+                continue
+            unique_stream_tables.append(table)
+        
+        all_tables = lattice_tables + unique_stream_tables
         
         # Sort by page and table number
         all_tables.sort(key=lambda x: (x['page'], x['table_number']))
         
         logger.info(f"Auto mode found {len(all_tables)} total tables "
-                   f"(lattice: {len(lattice_tables)}, stream: {len(stream_tables)})")
+                   f"(lattice: {len(lattice_tables)}, stream: {len(unique_stream_tables)}, "
+                   f"duplicates dropped: {len(stream_tables) - len(unique_stream_tables)})")
         
         return all_tables
     
+    def _init_kwargs(self) -> Dict:
+        """Constructor arguments that recreate this extractor in a worker process"""
+        return {
+            'flavor': self.flavor,
+            'cache_dir': self.cache_dir,
+            'pretty_markdown': self.pretty_markdown
+        }
+    
+    @staticmethod
+    def _bbox_iou(a: tuple, b: tuple) -> float:
+        """Intersection over union of two (x1, y1, x2, y2) bounding boxes"""
+        ix = min(a[2], b[2]) - max(a[0], b[0])
+        iy = min(a[3], b[3]) - max(a[1], b[1])
+        if ix <= 0 or iy <= 0:
+            return 0.0
+        
+        intersection = ix * iy
+        union = ((a[2] - a[0]) * (a[3] - a[1]) +
+                 (b[2] - b[0]) * (b[3] - b[1]) - intersection)
+        return intersection / union if union > 0 else 0.0
+    
+    def _serializers(self) -> Dict[str, Callable]:
+        """Text formats offered by each extracted table"""
+        return {
+            'text': self._table_to_text,
+            'csv': self._table_to_csv,
+            'json': self._table_to_json,
+            'markdown': self._table_to_markdown
+        }
+    
+    def _table_to_csv(self, df: pd.DataFrame) -> str:
+        """Convert DataFrame to CSV"""
+        return df.to_csv(index=False)
+    
+    def _table_to_json(self, df: pd.DataFrame) -> str:
+        """Convert DataFrame to JSON records"""
+        return df.to_json(orient='records')
+    
     def _table_to_text(self, df: pd.DataFrame) -> str:
         """Convert DataFrame to readable text"""
         return df.to_string(index=False)
     
     def _table_to_markdown(self, df: pd.DataFrame) -> str:
         """Convert DataFrame to Markdown table"""
-        return df.to_markdown(index=False)
+        if self.pretty_markdown:
+            return df.to_markdown(index=False)
+        
+        if df.shape[1] == 0:
+            return ''
+        
+        # Plain pipe table built directly, without tabulate's column padding
+        lines = [self._markdown_row(df.columns),
+                 '|' + '|'.join(['---'] * df.shape[1]) + '|']
+        lines.extend(self._markdown_row(row) for row in df.itertuples(index=False, name=None))
+        return '\n'.join(lines)
+    
+    def _markdown_row(self, cells) -> str:
+        """Render one Markdown table row, escaping pipes and line breaks"""
+        return '| ' + ' | '.join(
+            str(cell).replace('|', '\\|').replace('\n', ' ') for cell in cells) + ' |'
     
-    def save_tables(self, tables: List[Dict], output_dir: Path):
+    def save_tables(self,
+                    tables: Iterable[Dict],
+                    output_dir: Path,
+                    formats: tuple = ('csv', 'md')):
         """
         Save extracted tables to files
         
         Args:
-            tables: List of table dictionaries
+            tables: Table dictionaries; any iterable, including iter_tables(),
+                is consumed lazily with only a few tables in flight at once
             output_dir: Directory to save tables
+            formats: File formats to write ('csv', 'md', 'xlsx'); Excel is
+                opt-in because it is by far the slowest writer
         """
         output_dir = Path(output_dir)
         output_dir.mkdir(parents=True, exist_ok=True)
         
-        for table in tables:
-            table_num = table['table_number']
-            page = table['page']
-            df = table['dataframe']
-            
-            # Save in multiple formats
-            base_name = f"table_{page}_{table_num}"
-            
-            # CSV
-            csv_path = output_dir / f"{base_name}.csv"
-            df.to_csv(csv_path, index=False)
+        excel_engine = self._excel_engine() if 'xlsx' in formats else None
+        
+        # CSV and Markdown outputs are small, so they are rendered up front and
+        # written in batches, one pool task per batch instead of one per file;
+        # Excel files are slow to build and keep a task of their own
+        with ThreadPoolExecutor(max_workers=self.SAVE_WORKERS) as executor:
+            pending = deque()
+            batch = self._new_save_batch()
             
-            # Excel
-            excel_path = output_dir / f"{base_name}.xlsx"
-            df.to_excel(excel_path, index=False, engine='openpyxl')
+            for table in tables:
+                table_num = table['table_number']
+                page = table['page']
+                df = table['dataframe']
+                
+                # Save in multiple formats
+                base_name = f"table_{page}_{table_num}"
+                
+                # CSV
+                if 'csv' in formats:
+                    batch['files'].append((output_dir / f"{base_name}.csv", df.to_csv(index=False)))
+                
+                # Excel
+                if 'xlsx' in formats:
+                    batch['futures'].append(executor.submit(
+                        df.to_excel, output_dir / f"{base_name}.xlsx",
+                        index=False, engine=excel_engine))
+                
+                # Markdown
+                if 'md' in formats:
+                    batch['files'].append((output_dir / f"{base_name}.md", table['markdown']))
+                
+                batch['tables'].append((table_num, page))
+                
+                if len(batch['tables']) >= self.SAVE_BATCH_TABLES:
+                    pending.append(self._submit_save_batch(executor, batch))
+                    batch = self._new_save_batch()
+                
+                # Bound the tables held by queued writes when streaming
+                while len(pending) > self.SAVE_WORKERS:
+                    self._finish_save(pending.popleft(), output_dir)
             
-            # Markdown
-            md_path = output_dir / f"{base_name}.md"
-            md_path.write_text(table['markdown'])
+            if batch['tables']:
+                pending.append(self._submit_save_batch(executor, batch))
             
+            while pending:
+                self._finish_save(pending.popleft(), output_dir)
+    
+    def _new_save_batch(self) -> Dict[str, list]:
+        """Empty batch of rendered files, Excel futures and table labels"""
+        return {'files': [], 'futures': [], 'tables': []}
+    
+    def _submit_save_batch(self, executor: ThreadPoolExecutor, batch: Dict[str, list]) -> Dict[str, list]:
+        """Queue a batch's rendered files as a single write task"""
+        if batch['files']:
+            batch['futures'].append(executor.submit(self._write_files, batch.pop('files')))
+        return batch
+    
+    def _write_files(self, files: List[tuple]):
+        """Write (path, text) pairs sequentially"""
+        for path, text in files:
+            with open(path, 'w', encoding='utf-8') as f:
+                f.write(text)
+    
+    def _finish_save(self, batch: Dict[str, list], output_dir: Path):
+        """Wait for one batch's writes and log its tables"""
+        for future in batch['futures']:
+            future.result()
+        for table_num, page in batch['tables']:
             logger.info(f"Saved table {table_num} from page {page} to {output_dir}")
     
+    def _excel_engine(self) -> str:
+        """Prefer the faster xlsxwriter engine, falling back to openpyxl"""
+        import importlib.util
+        return 'xlsxwriter' if importlib.util.find_spec('xlsxwriter') else 'openpyxl'
+    
     def analyze_table(self, table_dict: Dict) -> Dict:
         """
         Analyze table characteristics
@@ -213,12 +683,10 @@ class TableExtractor:
         if df.empty:
             return False
         
-        # Check if first row has different characteristics than rest
         first_row = df.iloc[0]
-        rest = df.iloc[1:]
         
         # Simple heuristic: headers are usually text, data is often numeric
-        first_row_text = sum(isinstance(x, str) for x in first_row)
+        first_row_text = first_row.map(type).eq(str).sum()
         return first_row_text > len(first_row) * 0.5
     
     def filter_tables(self, 
@@ -10,7 +10,8 @@ from .schema import (
     EdgeSchema,
     GraphStatistics,
     validate_node,
-    validate_edge
+    validate_edge,
+    bulk_timestamp
 )
 
 from .entity_extractor import EntityExtractor
@@ -28,6 +29,7 @@ __all__ = [
     'GraphStatistics',
     'validate_node',
     'validate_edge',
+    'bulk_timestamp',
     
     # Entity Extraction
     'EntityExtractor',
@@ -3,20 +3,134 @@ Entity Extractor Module
 Extracts entities (authors, concepts, methods, datasets) from research papers
 """
 import re
+import copy
+import json
+import hashlib
 import logging
-from typing import List, Dict, Set, Optional, Any
+from collections import Counter, OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import List, Dict, Set, Optional, Any, Iterable, NamedTuple
 from pathlib import Path
 
+try:
+    import ahocorasick  # Optional: pyahocorasick for multi-term scanning
+except ImportError:
+    ahocorasick = None
+
 logger = logging.getLogger(__name__)
 
+_WORD_RE = re.compile(r'\b[a-z]+\b')
+_NAME_RE = re.compile(r'\b([A-Z][a-z]+(?:\s+[A-Z][a-z]+)+)\b')
+
+# Named algorithms ("Viterbi algorithm") and datasets ("Penn Treebank corpus")
+# in one alternation, so methods and datasets share a single scan
+_NAMED_ENTITY_RE = re.compile(
+    r'\b(?P<method>[A-Z][a-z]+(?:\s+[A-Z][a-z]+)*\s+(?:algorithm|method|approach))\b'
+    r'|\b(?P<dataset>[A-Z][a-zA-Z0-9\-]+(?:\s+[A-Z][a-zA-Z0-9\-]+)*)\s+(?:dataset|corpus|benchmark)\b'
+)
+
+# Entity ids map spaces (and, for datasets, hyphens) to underscores; the
+# query interface rebuilds author/concept/method ids the same way
+_ID_TRANSLATION = str.maketrans({' ': '_'})
+_DATASET_ID_TRANSLATION = str.maketrans({' ': '_', '-': '_'})
+
+
+@lru_cache(maxsize=8192)
+def _entity_id(prefix: str, name: str, fold_hyphens: bool = False) -> str:
+    """Build a canonical entity id; memoized since names repeat across papers"""
+    table = _DATASET_ID_TRANSLATION if fold_hyphens else _ID_TRANSLATION
+    return f"{prefix}_{name.lower().translate(table)}"
+
+
+def _compile_vocabulary(terms: Iterable[str], word_boundary: bool = True):
+    """
+    Compile a vocabulary into a single-pass matcher with a ``findall`` method
+    
+    Uses an Aho-Corasick automaton when pyahocorasick is installed and a
+    regex alternation otherwise. Either way every occurrence of every term
+    is reported, including terms nested inside longer ones (e.g. 'neural
+    network' within 'convolutional neural network'); at a given start
+    position only the longest term counts. Text is expected in lowercase.
+    """
+    terms = sorted(terms, key=len, reverse=True)
+    if ahocorasick is not None:
+        return _AhoCorasickMatcher(terms, word_boundary)
+    
+    # Terms are tried longest-first inside a zero-width lookahead
+    alternation = '|'.join(re.escape(term) for term in terms)
+    if word_boundary:
+        alternation = rf'\b(?:{alternation})\b'
+    return re.compile(f'(?=({alternation}))', re.IGNORECASE)
+
+
+def _is_word_char(char: str) -> bool:
+    return char.isalnum() or char == '_'
+
+
+class _AhoCorasickMatcher:
+    """Multi-term matcher over a single automaton scan, mirroring the regex path"""
+    
+    def __init__(self, terms: List[str], word_boundary: bool):
+        self.word_boundary = word_boundary
+        self._automaton = ahocorasick.Automaton()
+        for term in terms:
+            self._automaton.add_word(term, term)
+        self._automaton.make_automaton()
+    
+    def _at_boundary(self, text: str, pos: int) -> bool:
+        before = pos > 0 and _is_word_char(text[pos - 1])
+        after = pos < len(text) and _is_word_char(text[pos])
+        return before != after
+    
+    def findall(self, text: str) -> List[str]:
+        """Return matched terms in order of their start position"""
+        longest_at = {}
+        
+        for end, term in self._automaton.iter(text):
+            start = end - len(term) + 1
+            if self.word_boundary and not (self._at_boundary(text, start) and
+                                           self._at_boundary(text, end + 1)):
+                continue
+            if len(term) > len(longest_at.get(start, '')):
+                longest_at[start] = term
+        
+        return [longest_at[start] for start in sorted(longest_at)]
+
+
+class _PaperText(NamedTuple):
+    """Text views of a paper, assembled once and shared by the extractors"""
+    body: str        # full_text and section contents, original case
+    body_lower: str  # body, lowercased
+    all_lower: str   # title, abstract and body, lowercased
+
 
 class EntityExtractor:
     """Extract entities from research paper text"""
     
-    def __init__(self):
-        """Initialize entity extractor"""
+    # Bound on distinct n-grams held while counting key phrases, and the
+    # number of word positions counted between checks
+    KEY_PHRASE_CAP = 200_000
+    KEY_PHRASE_BLOCK = 50_000
+    
+    def __init__(self, cache_dir: Optional[str] = None, cache_size: int = 512):
+        """
+        Initialize entity extractor
+        
+        Args:
+            cache_dir: Optional directory to persist extracted entities across
+                sessions, keyed by a content hash of the paper
+            cache_size: Number of papers kept in the in-memory cache
+        """
         self.logger = logger
         
+        # Content-hash cache for extract_all_entities
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        if self.cache_dir:
+            self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.cache_size = cache_size
+        self._cache: OrderedDict = OrderedDict()
+        
         # Common ML/AI concepts and methods (can be expanded)
         self.ml_methods = {
             'neural network', 'deep learning', 'machine learning', 'random forest',
@@ -42,6 +156,11 @@ class EntityExtractor:
             'hyperparameter', 'feature extraction', 'embedding',
             'loss function', 'activation function', 'dropout', 'batch normalization'
         }
+        
+        # One precompiled scan per vocabulary (datasets keep substring matching)
+        self._concepts_re = _compile_vocabulary(self.tech_concepts)
+        self._methods_re = _compile_vocabulary(self.ml_methods)
+        self._datasets_re = _compile_vocabulary(self.known_datasets, word_boundary=False)
     
     def extract_authors(self, paper_data: Dict) -> List[Dict[str, Any]]:
         """
@@ -82,48 +201,22 @@ class EntityExtractor:
         Returns:
             List of concept entities with properties
         """
+        return self._extract_concepts(self._paper_text(paper_data), top_n)
+    
+    def _extract_concepts(self, text: _PaperText, top_n: int = 20) -> List[Dict[str, Any]]:
+        """Extract key concepts from assembled paper text"""
         concepts = {}
-        
-        # Combine text from title, abstract, and sections
-        text_parts = []
-        
-        if 'title' in paper_data:
-            text_parts.append(paper_data['title'])
-        
-        if 'abstract' in paper_data:
-            text_parts.append(paper_data['abstract'])
-        
-        if 'full_text' in paper_data:
-            text_parts.append(paper_data['full_text'])
-        
-        if 'sections' in paper_data:
-            sections = paper_data['sections']
-            # Handle both list and dict formats
-            if isinstance(sections, list):
-                for section in sections:
-                    if isinstance(section, dict):
-                        text = section.get('content') or section.get('text', '')
-                        text_parts.append(text)
-                    elif isinstance(section, str):
-                        text_parts.append(section)
-            elif isinstance(sections, dict):
-                for section_content in sections.values():
-                    if isinstance(section_content, str):
-                        text_parts.append(section_content)
-        
-        full_text = ' '.join(str(part) for part in text_parts).lower()
+        full_text = text.all_lower
         
         # Extract known technical concepts
-        for concept in self.tech_concepts:
-            count = len(re.findall(r'\b' + re.escape(concept) + r'\b', full_text, re.IGNORECASE))
-            if count > 0:
-                concept_id = self._generate_concept_id(concept)
-                concepts[concept_id] = {
-                    'name': concept,
-                    'concept_id': concept_id,
-                    'frequency': count,
-                    'category': 'technical_concept'
-                }
+        for concept, count in Counter(self._concepts_re.findall(full_text)).items():
+            concept_id = self._generate_concept_id(concept)
+            concepts[concept_id] = {
+                'name': concept,
+                'concept_id': concept_id,
+                'frequency': count,
+                'category': 'technical_concept'
+            }
         
         # Extract key phrases using simple heuristics
         # (In production, would use more sophisticated NLP/LLM extraction)
@@ -159,46 +252,31 @@ class EntityExtractor:
         Returns:
             List of method entities with properties
         """
+        return self._extract_methods(self._paper_text(paper_data))
+    
+    def _extract_methods(self,
+                         text: _PaperText,
+                         named: Optional[Dict[str, List[str]]] = None) -> List[Dict[str, Any]]:
+        """Extract methods/algorithms from assembled paper text"""
         methods = {}
-        
-        # Combine text from all sections
-        text_parts = []
-        
-        if 'full_text' in paper_data:
-            text_parts.append(paper_data['full_text'])
-        
-        if 'sections' in paper_data:
-            sections = paper_data['sections']
-            if isinstance(sections, list):
-                for section in sections:
-                    if isinstance(section, dict):
-                        text = section.get('content') or section.get('text', '')
-                        text_parts.append(text)
-            elif isinstance(sections, dict):
-                for section_content in sections.values():
-                    if isinstance(section_content, str):
-                        text_parts.append(section_content)
-        
-        full_text = ' '.join(str(part) for part in text_parts).lower()
+        full_text = text.body_lower
         
         # Extract known ML methods
-        for method in self.ml_methods:
-            count = len(re.findall(r'\b' + re.escape(method) + r'\b', full_text, re.IGNORECASE))
-            if count > 0:
-                method_id = self._generate_method_id(method)
-                methods[method_id] = {
-                    'name': method,
-                    'method_id': method_id,
-                    'frequency': count,
-                    'category': 'machine_learning'
-                }
+        for method, count in Counter(self._methods_re.findall(full_text)).items():
+            method_id = self._generate_method_id(method)
+            methods[method_id] = {
+                'name': method,
+                'method_id': method_id,
+                'frequency': count,
+                'category': 'machine_learning'
+            }
         
         # Extract algorithm names (simple pattern matching)
-        algorithm_pattern = r'\b([A-Z][a-z]+(?:\s+[A-Z][a-z]+)*\s+(?:algorithm|method|approach))\b'
-        algorithm_matches = re.finditer(algorithm_pattern, ' '.join(text_parts))
+        if named is None:
+            named = self._scan_named_entities(text.body)
         
-        for match in algorithm_matches:
-            method_name = match.group(1).lower()
+        for method_name in named['method']:
+            method_name = method_name.lower()
             method_id = self._generate_method_id(method_name)
             if method_id not in methods:
                 methods[method_id] = {
@@ -220,43 +298,29 @@ class EntityExtractor:
         Returns:
             List of dataset entities with properties
         """
+        return self._extract_datasets(self._paper_text(paper_data))
+    
+    def _extract_datasets(self,
+                          text: _PaperText,
+                          named: Optional[Dict[str, List[str]]] = None) -> List[Dict[str, Any]]:
+        """Extract datasets from assembled paper text"""
         datasets = {}
-        
-        # Combine text from all sections
-        text_parts = []
-        
-        if 'full_text' in paper_data:
-            text_parts.append(paper_data['full_text'])
-        
-        if 'sections' in paper_data:
-            sections = paper_data['sections']
-            if isinstance(sections, list):
-                for section in sections:
-                    if isinstance(section, dict):
-                        text = section.get('content') or section.get('text', '')
-                        text_parts.append(text)
-            elif isinstance(sections, dict):
-                for section_content in sections.values():
-                    if isinstance(section_content, str):
-                        text_parts.append(section_content)
-        
-        full_text = ' '.join(str(part) for part in text_parts).lower()
+        full_text = text.body_lower
         
         # Extract known datasets
-        for dataset in self.known_datasets:
-            if dataset in full_text:
-                dataset_id = self._generate_dataset_id(dataset)
-                datasets[dataset_id] = {
-                    'name': dataset,
-                    'dataset_id': dataset_id
-                }
+        for dataset in dict.fromkeys(self._datasets_re.findall(full_text)):
+            dataset_id = self._generate_dataset_id(dataset)
+            datasets[dataset_id] = {
+                'name': dataset,
+                'dataset_id': dataset_id
+            }
         
         # Extract dataset patterns (e.g., "X dataset", "X corpus")
-        dataset_pattern = r'\b([A-Z][a-zA-Z0-9\-]+(?:\s+[A-Z][a-zA-Z0-9\-]+)*)\s+(?:dataset|corpus|benchmark)\b'
-        dataset_matches = re.finditer(dataset_pattern, ' '.join(text_parts))
+        if named is None:
+            named = self._scan_named_entities(text.body)
         
-        for match in dataset_matches:
-            dataset_name = match.group(1).strip()
+        for dataset_name in named['dataset']:
+            dataset_name = dataset_name.strip()
             dataset_id = self._generate_dataset_id(dataset_name.lower())
             if dataset_id not in datasets:
                 datasets[dataset_id] = {
@@ -277,30 +341,137 @@ class EntityExtractor:
         Returns:
             Dictionary with entity types as keys and lists of entities as values
         """
-        return {
-            'authors': self.extract_authors(paper_data),
-            'concepts': self.extract_concepts(paper_data),
-            'methods': self.extract_methods(paper_data),
-            'datasets': self.extract_datasets(paper_data)
-        }
+        fingerprint = self._paper_fingerprint(paper_data)
+        
+        cached = self._get_cached_entities(fingerprint)
+        if cached is not None:
+            self.logger.debug(f"Entity cache hit for {fingerprint}")
+            return cached
+        
+        # Assemble the paper text, and scan it for named methods and
+        # datasets, once for all text-based extractors
+        text = self._paper_text(paper_data)
+        named = self._scan_named_entities(text.body)
+        
+        # The entity types are independent once the text is assembled
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            futures = {
+                'authors': executor.submit(self.extract_authors, paper_data),
+                'concepts': executor.submit(self._extract_concepts, text),
+                'methods': executor.submit(self._extract_methods, text, named),
+                'datasets': executor.submit(self._extract_datasets, text, named)
+            }
+            entities = {entity_type: future.result() for entity_type, future in futures.items()}
+        
+        self._store_cached_entities(fingerprint, entities)
+        return entities
     
     # Helper methods
     
+    def _paper_text(self, paper_data: Dict) -> _PaperText:
+        """Join title, abstract, full text and sections in a single traversal"""
+        body_parts = []
+        
+        if 'full_text' in paper_data:
+            body_parts.append(paper_data['full_text'])
+        
+        if 'sections' in paper_data:
+            sections = paper_data['sections']
+            # Handle both list and dict formats
+            if isinstance(sections, list):
+                for section in sections:
+                    if isinstance(section, dict):
+                        body_parts.append(section.get('content') or section.get('text', ''))
+                    elif isinstance(section, str):
+                        body_parts.append(section)
+            elif isinstance(sections, dict):
+                for section_content in sections.values():
+                    if isinstance(section_content, str):
+                        body_parts.append(section_content)
+        
+        head_parts = [paper_data[key] for key in ('title', 'abstract') if key in paper_data]
+        
+        body = ' '.join(str(part) for part in body_parts)
+        body_lower = body.lower()
+        all_parts = [str(part).lower() for part in head_parts]
+        if body_parts:
+            all_parts.append(body_lower)
+        
+        return _PaperText(body=body, body_lower=body_lower, all_lower=' '.join(all_parts))
+    
+    def _scan_named_entities(self, body: str) -> Dict[str, List[str]]:
+        """Collect pattern-matched method and dataset names in one pass"""
+        named = {'method': [], 'dataset': []}
+        for match in _NAMED_ENTITY_RE.finditer(body):
+            named[match.lastgroup].append(match.group(match.lastgroup))
+        return named
+    
+    def _paper_fingerprint(self, paper_data: Dict) -> str:
+        """Hash the paper fields and vocabularies that entity extraction reads"""
+        relevant = {
+            'title': paper_data.get('title'),
+            'abstract': paper_data.get('abstract'),
+            'full_text': paper_data.get('full_text'),
+            'sections': paper_data.get('sections'),
+            'authors': (paper_data.get('metadata') or {}).get('authors'),
+            'vocabulary': [sorted(self.tech_concepts), sorted(self.ml_methods),
+                           sorted(self.known_datasets)]
+        }
+        serialized = json.dumps(relevant, sort_keys=True, default=str)
+        return hashlib.blake2b(serialized.encode('utf-8'), digest_size=16).hexdigest()
+    
+    def _get_cached_entities(self, fingerprint: str) -> Optional[Dict[str, List[Dict]]]:
+        """Look up entities in the in-memory cache, then on disk"""
+        if fingerprint in self._cache:
+            self._cache.move_to_end(fingerprint)
+            return copy.deepcopy(self._cache[fingerprint])
+        
+        if self.cache_dir:
+            cache_path = self.cache_dir / f"{fingerprint}.json"
+            if cache_path.exists():
+                try:
+                    entities = json.loads(cache_path.read_text(encoding='utf-8'))
+                except (OSError, ValueError) as e:
+                    self.logger.warning(f"Ignoring unreadable entity cache {cache_path}: {e}")
+                    return None
+                self._remember(fingerprint, entities)
+                return copy.deepcopy(entities)
+        
+        return None
+    
+    def _store_cached_entities(self, fingerprint: str, entities: Dict[str, List[Dict]]):
+        """Store entities in the in-memory cache and, if configured, on disk"""
+        self._remember(fingerprint, copy.deepcopy(entities))
+        
+        if self.cache_dir:
+            cache_path = self.cache_dir / f"{fingerprint}.json"
+            try:
+                cache_path.write_text(json.dumps(entities, ensure_ascii=False), encoding='utf-8')
+            except (OSError, TypeError) as e:
+                self.logger.warning(f"Could not write entity cache {cache_path}: {e}")
+    
+    def _remember(self, fingerprint: str, entities: Dict[str, List[Dict]]):
+        """Insert into the in-memory LRU cache, evicting the oldest entry"""
+        self._cache[fingerprint] = entities
+        self._cache.move_to_end(fingerprint)
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+    
     def _generate_author_id(self, name: str) -> str:
         """Generate unique ID for author"""
-        return f"author_{name.lower().replace(' ', '_')}"
+        return _entity_id('author', name)
     
     def _generate_concept_id(self, concept: str) -> str:
         """Generate unique ID for concept"""
-        return f"concept_{concept.lower().replace(' ', '_')}"
+        return _entity_id('concept', concept)
     
     def _generate_method_id(self, method: str) -> str:
         """Generate unique ID for method"""
-        return f"method_{method.lower().replace(' ', '_')}"
+        return _entity_id('method', method)
     
     def _generate_dataset_id(self, dataset: str) -> str:
         """Generate unique ID for dataset"""
-        return f"dataset_{dataset.lower().replace(' ', '_').replace('-', '_')}"
+        return _entity_id('dataset', dataset, fold_hyphens=True)
     
     def _extract_authors_from_text(self, paper_data: Dict) -> List[Dict[str, Any]]:
         """Extract authors from paper text (fallback method)"""
@@ -323,10 +494,11 @@ class EntityExtractor:
                         break
             
             if text:
-                # Simple pattern: look for capitalized names
+                # Simple pattern: look for capitalized names in the opening
+                # text, sliced before any conversion to avoid copying it all
                 # (In production, would use NER)
-                name_pattern = r'\b([A-Z][a-z]+(?:\s+[A-Z][a-z]+)+)\b'
-                potential_names = re.findall(name_pattern, str(text)[:1000])
+                head = text[:1000] if isinstance(text, str) else str(text)[:1000]
+                potential_names = _NAME_RE.findall(head)
                 
                 # Filter to likely author names (appears near beginning)
                 for name in potential_names[:5]:  # Limit to first 5 names
@@ -340,19 +512,20 @@ class EntityExtractor:
     def _extract_key_phrases(self, text: str, min_freq: int = 2) -> Dict[str, int]:
         """Extract key phrases using simple frequency analysis"""
         # Tokenize into bigrams and trigrams
-        words = re.findall(r'\b[a-z]+\b', text.lower())
-        
-        phrases = {}
-        
-        # Bigrams
-        for i in range(len(words) - 1):
-            phrase = f"{words[i]} {words[i+1]}"
-            phrases[phrase] = phrases.get(phrase, 0) + 1
-        
-        # Trigrams
-        for i in range(len(words) - 2):
-            phrase = f"{words[i]} {words[i+1]} {words[i+2]}"
-            phrases[phrase] = phrases.get(phrase, 0) + 1
+        words = _WORD_RE.findall(text.lower())
+        
+        # Count n-grams as word tuples, one block of start positions at a
+        # time; when the table outgrows KEY_PHRASE_CAP, phrases still below
+        # min_freq are dropped, so memory stays bounded on very long texts
+        # (short texts never reach the cap and are counted exactly)
+        phrases = Counter()
+        for start in range(0, len(words), self.KEY_PHRASE_BLOCK):
+            end = start + self.KEY_PHRASE_BLOCK
+            phrases.update(zip(words[start:end], words[start + 1:end + 1]))
+            phrases.update(zip(words[start:end], words[start + 1:end + 1], words[start + 2:end + 2]))
+            
+            if len(phrases) > self.KEY_PHRASE_CAP:
+                phrases = Counter({k: v for k, v in phrases.items() if v >= min_freq})
         
-        # Filter by minimum frequency
-        return {k: v for k, v in phrases.items() if v >= min_freq}
+        # Filter by minimum frequency; join only the frequent ones
+        return {' '.join(k): v for k, v in phrases.items() if v >= min_freq}
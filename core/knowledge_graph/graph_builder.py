@@ -4,30 +4,128 @@ Constructs and manages the research paper knowledge graph
 """
 import networkx as nx
 import logging
-from typing import List, Dict, Set, Optional, Any, Tuple
+import os
+from concurrent.futures import ProcessPoolExecutor
+from collections import Counter, defaultdict
+from itertools import chain, combinations
+from typing import List, Dict, Set, FrozenSet, Optional, Any, Tuple, Iterable
 from pathlib import Path
 import json
 
+try:
+    import orjson  # Optional: faster JSON export
+except ImportError:
+    orjson = None
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+try:
+    from scipy import sparse  # Optional: sparse co-occurrence for concept relationships
+except ImportError:
+    sparse = None
+
+try:
+    import numba  # Optional: compiled kernel for dense concept co-occurrence
+except ImportError:
+    numba = None
+
 from .schema import (
     NodeType, EdgeType, NodeSchema, EdgeSchema,
-    validate_node, validate_edge, GraphStatistics
+    validate_node, validate_edge, GraphStatistics, slugify, bulk_timestamp
 )
 from .entity_extractor import EntityExtractor
 
 logger = logging.getLogger(__name__)
 
 
+if numba is not None:
+    @numba.njit(cache=True)
+    def _bitset_cooccurrence(bits, out):
+        """
+        Fill out[i, j] (i < j) with the number of papers shared by concepts i
+        and j, given one row of 64-paper bitset words per concept
+        """
+        m1 = np.uint64(0x5555555555555555)
+        m2 = np.uint64(0x3333333333333333)
+        m4 = np.uint64(0x0F0F0F0F0F0F0F0F)
+        h01 = np.uint64(0x0101010101010101)
+        one, two, four, top = np.uint64(1), np.uint64(2), np.uint64(4), np.uint64(56)
+        num_concepts, num_words = bits.shape
+        for i in range(num_concepts):
+            for j in range(i + 1, num_concepts):
+                total = np.uint64(0)
+                for w in range(num_words):
+                    # SWAR popcount of the shared papers in this word
+                    x = bits[i, w] & bits[j, w]
+                    x = x - ((x >> one) & m1)
+                    x = (x & m2) + ((x >> two) & m2)
+                    x = (x + (x >> four)) & m4
+                    total += (x * h01) >> top
+                out[i, j] = total
+
+
+# Entity extractor of a worker process, built once by _init_entity_worker
+_worker_extractor: Optional[EntityExtractor] = None
+
+
+def _init_entity_worker():
+    """Build the entity extractor once per worker process"""
+    global _worker_extractor
+    _worker_extractor = EntityExtractor()
+
+
+def _extract_entities(paper_data: Dict) -> Dict[str, List[Dict]]:
+    """Extract all entities of one paper in a worker process"""
+    return _worker_extractor.extract_all_entities(paper_data)
+
+
+def _dump_json(obj: Any) -> bytes:
+    """Serialize one object to UTF-8 JSON, using orjson when installed"""
+    if orjson is not None:
+        return orjson.dumps(obj, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+    return json.dumps(obj, ensure_ascii=False).encode('utf-8')
+
+
 class KnowledgeGraphBuilder:
     """Build and manage knowledge graph from research papers"""
     
+    # Concept co-occurrence is counted pair by pair for a paper x concept
+    # matrix below COUNTED_MAX_CELLS; the numba bitset kernel (when installed)
+    # takes matrices of at least DENSE_MIN_CELLS (enough work to repay loading
+    # the compiled kernel) with at most DENSE_MAX_CONCEPTS concepts and at
+    # least DENSE_MIN_FILL of it filled; otherwise the sparse product
+    COUNTED_MAX_CELLS = 10_000
+    DENSE_MIN_CELLS = 1_000_000
+    DENSE_MAX_CONCEPTS = 2048
+    DENSE_MIN_FILL = 0.05
+    
     def __init__(self):
         """Initialize knowledge graph builder"""
-        self.graph = nx.MultiDiGraph()  # Directed graph allowing multiple edges
+        # Directed graph allowing multiple edges between the same nodes; edges
+        # are keyed by edge type, so parallel edges always differ in type
+        self.graph = nx.MultiDiGraph()
         self.entity_extractor = EntityExtractor()
         self.logger = logger
         
         # Track entities for deduplication
         self._node_index: Dict[str, str] = {}  # node_id -> node_type
+        
+        # node_type -> node_ids in insertion order (dict used as an ordered set)
+        self._nodes_by_type: Dict[str, Dict[str, None]] = defaultdict(dict)
+        
+        # edge_type -> target_id -> source_ids, one entry per distinct edge
+        self._rev_by_type: Dict[str, Dict[str, List[str]]] = defaultdict(lambda: defaultdict(list))
+        
+        # edge_type -> target_id -> distinct source_ids; built on demand and
+        # dropped whenever an edge of that type is added
+        self._entity_papers: Dict[str, Dict[str, FrozenSet[str]]] = {}
+        
+        # Incremented whenever nodes or edges are added or updated, so query
+        # caches (see KnowledgeGraphQuery) can tell when they are stale
+        self.version = 0
     
     def add_paper_to_graph(
         self,
@@ -44,6 +142,106 @@ class KnowledgeGraphBuilder:
         Returns:
             paper_id of the added paper
         """
+        paper_id, nodes, edges = self._paper_records(paper_data, extract_entities)
+        
+        for node in nodes:
+            self._add_node(node)
+        for edge in edges:
+            self._add_edge(edge)
+        
+        self.logger.info(f"Added paper {paper_id} to knowledge graph")
+        return paper_id
+    
+    def add_papers_batch(
+        self,
+        papers: Iterable[Dict],
+        extract_entities: bool = True
+    ) -> List[str]:
+        """
+        Add many papers and their entities in one bulk insert
+        
+        Builds the same graph as calling add_paper_to_graph for each paper,
+        but all validated nodes and edges go to NetworkX through a single
+        add_nodes_from and a single add_edges_from call.
+        
+        Args:
+            papers: Paper data dictionaries from Phase 2.1 extraction
+            extract_entities: Whether to extract and add entities
+            
+        Returns:
+            paper_ids of the added papers, in input order
+        """
+        paper_ids, nodes, edges = [], [], []
+        with bulk_timestamp():
+            for paper_data in papers:
+                paper_id, paper_nodes, paper_edges = self._paper_records(paper_data, extract_entities)
+                paper_ids.append(paper_id)
+                nodes.extend(paper_nodes)
+                edges.extend(paper_edges)
+            
+            self._add_nodes_bulk(nodes)
+            self._add_edges_bulk(edges)
+        
+        self.logger.info(f"Added {len(paper_ids)} papers to knowledge graph")
+        return paper_ids
+    
+    def add_papers_parallel(
+        self,
+        papers: Iterable[Dict],
+        workers: Optional[int] = None
+    ) -> List[str]:
+        """
+        Add many papers, extracting their entities in worker processes
+        
+        Entity extraction is spread over a process pool (each worker builds
+        its own EntityExtractor once); the graph itself is then assembled in
+        this process exactly as add_papers_batch would.
+        
+        Args:
+            papers: Paper data dictionaries from Phase 2.1 extraction
+            workers: Number of worker processes (defaults to CPU count)
+            
+        Returns:
+            paper_ids of the added papers, in input order
+        """
+        papers = list(papers)
+        workers = min(workers or os.cpu_count() or 1, len(papers))
+        if workers <= 1:
+            return self.add_papers_batch(papers)
+        
+        chunksize = max(1, len(papers) // workers)
+        self.logger.info(f"Extracting entities from {len(papers)} papers with {workers} workers")
+        
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_entity_worker) as executor:
+            all_entities = list(executor.map(_extract_entities, papers, chunksize=chunksize))
+        
+        paper_ids, nodes, edges = [], [], []
+        with bulk_timestamp():
+            for paper_data, entities in zip(papers, all_entities):
+                paper_id, paper_nodes, paper_edges = self._paper_records(
+                    paper_data, True, entities=entities
+                )
+                paper_ids.append(paper_id)
+                nodes.extend(paper_nodes)
+                edges.extend(paper_edges)
+            
+            self._add_nodes_bulk(nodes)
+            self._add_edges_bulk(edges)
+        
+        self.logger.info(f"Added {len(paper_ids)} papers to knowledge graph")
+        return paper_ids
+    
+    def _paper_records(
+        self,
+        paper_data: Dict,
+        extract_entities: bool,
+        entities: Optional[Dict[str, List[Dict]]] = None
+    ) -> Tuple[str, List[NodeSchema], List[EdgeSchema]]:
+        """
+        Build the nodes and edges describing one paper and its entities
+        
+        Entities already extracted for the paper can be passed in ``entities``.
+        """
         # Extract paper information
         paper_id = paper_data.get('paper_id', self._generate_paper_id(paper_data))
         
@@ -69,12 +267,13 @@ class KnowledgeGraphBuilder:
         if 'references' in paper_data:
             paper_node.properties['references'] = paper_data['references']
         
-        # Add node to graph
-        self._add_node(paper_node)
+        nodes = [paper_node]
+        edges = []
         
         if extract_entities:
-            # Extract and add entities
-            entities = self.entity_extractor.extract_all_entities(paper_data)
+            # Extract entities and their edges
+            if entities is None:
+                entities = self.entity_extractor.extract_all_entities(paper_data)
             
             # Add authors
             for author in entities['authors']:
@@ -84,10 +283,10 @@ class KnowledgeGraphBuilder:
                     node_type=NodeType.AUTHOR,
                     properties=author
                 )
-                self._add_node(author_node)
+                nodes.append(author_node)
                 
                 # Create AUTHORED_BY edge
-                self._add_edge(EdgeSchema(
+                edges.append(EdgeSchema(
                     source_id=paper_id,
                     target_id=author_id,
                     edge_type=EdgeType.AUTHORED_BY
@@ -101,10 +300,10 @@ class KnowledgeGraphBuilder:
                     node_type=NodeType.CONCEPT,
                     properties=concept
                 )
-                self._add_node(concept_node)
+                nodes.append(concept_node)
                 
                 # Create DISCUSSES_CONCEPT edge
-                self._add_edge(EdgeSchema(
+                edges.append(EdgeSchema(
                     source_id=paper_id,
                     target_id=concept_id,
                     edge_type=EdgeType.DISCUSSES_CONCEPT,
@@ -119,10 +318,10 @@ class KnowledgeGraphBuilder:
                     node_type=NodeType.METHOD,
                     properties=method
                 )
-                self._add_node(method_node)
+                nodes.append(method_node)
                 
                 # Create USES_METHOD edge
-                self._add_edge(EdgeSchema(
+                edges.append(EdgeSchema(
                     source_id=paper_id,
                     target_id=method_id,
                     edge_type=EdgeType.USES_METHOD
@@ -136,17 +335,16 @@ class KnowledgeGraphBuilder:
                     node_type=NodeType.DATASET,
                     properties=dataset
                 )
-                self._add_node(dataset_node)
+                nodes.append(dataset_node)
                 
                 # Create USES_DATASET edge
-                self._add_edge(EdgeSchema(
+                edges.append(EdgeSchema(
                     source_id=paper_id,
                     target_id=dataset_id,
                     edge_type=EdgeType.USES_DATASET
                 ))
         
-        self.logger.info(f"Added paper {paper_id} to knowledge graph")
-        return paper_id
+        return paper_id, nodes, edges
     
     def add_citation_edges_from_phase3(self, citation_graph: nx.DiGraph):
         """
@@ -171,68 +369,217 @@ class KnowledgeGraphBuilder:
     
     def build_collaboration_network(self):
         """Build author collaboration edges based on co-authorship"""
-        # Get all author nodes
-        authors = [
-            node for node, data in self.graph.nodes(data=True)
-            if data.get('node_type') == NodeType.AUTHOR.value
-        ]
+        # Rank authors by graph order so each pair keeps a stable direction
+        author_rank = {
+            node: rank for rank, node in enumerate(self._nodes_by_type[NodeType.AUTHOR.value])
+        }
+        
+        # Invert author -> papers into each paper's authors, in rank order
+        papers_by_author = self._papers_by_entity(EdgeType.AUTHORED_BY.value)
+        paper_authors: Dict[str, List[str]] = defaultdict(list)
+        for author in author_rank:
+            for paper in papers_by_author.get(author, ()):
+                paper_authors[paper].append(author)
+        
+        # Count co-authored papers for every pair appearing on some paper;
+        # single-author papers cannot form a pair
+        pair_counts = Counter()
+        for authors in paper_authors.values():
+            if len(authors) > 1:
+                pair_counts.update(combinations(authors, 2))
         
         collaborations_added = 0
         
-        # For each pair of authors
-        for i, author1 in enumerate(authors):
-            for author2 in authors[i+1:]:
-                # Find papers they co-authored
-                papers1 = set(self._get_papers_by_author(author1))
-                papers2 = set(self._get_papers_by_author(author2))
-                common_papers = papers1 & papers2
-                
-                if common_papers:
-                    # Add collaboration edge
-                    self._add_edge(EdgeSchema(
-                        source_id=author1,
-                        target_id=author2,
-                        edge_type=EdgeType.COLLABORATES_WITH,
-                        properties={'num_papers': len(common_papers)}
-                    ))
-                    collaborations_added += 1
+        for (author1, author2), num_papers in sorted(
+            pair_counts.items(),
+            key=lambda item: (author_rank[item[0][0]], author_rank[item[0][1]])
+        ):
+            # Add collaboration edge
+            self._add_edge(EdgeSchema(
+                source_id=author1,
+                target_id=author2,
+                edge_type=EdgeType.COLLABORATES_WITH,
+                properties={'num_papers': num_papers}
+            ))
+            collaborations_added += 1
         
         self.logger.info(f"Added {collaborations_added} collaboration edges")
     
     def build_concept_relationships(self, similarity_threshold: float = 0.5):
         """Build relationships between related concepts"""
-        # Get all concept nodes
-        concepts = [
-            (node, data) for node, data in self.graph.nodes(data=True)
-            if data.get('node_type') == NodeType.CONCEPT.value
-        ]
+        # Rank concepts by graph order so each pair keeps a stable direction
+        concept_rank = {
+            node: rank for rank, node in enumerate(self._nodes_by_type[NodeType.CONCEPT.value])
+        }
+        
+        # Invert concept -> papers into each paper's concepts, in rank order
+        papers_by_concept = self._papers_by_entity(EdgeType.DISCUSSES_CONCEPT.value)
+        paper_concepts: Dict[str, List[str]] = defaultdict(list)
+        for concept in concept_rank:
+            for paper in papers_by_concept.get(concept, ()):
+                paper_concepts[paper].append(concept)
+        
+        # Only papers with two or more concepts produce co-occurrences; each
+        # concept's total paper count comes from its cached paper set instead
+        shared_concepts = [concepts for concepts in paper_concepts.values() if len(concepts) > 1]
+        
+        if len(shared_concepts) * len(concept_rank) < self.COUNTED_MAX_CELLS:
+            related_pairs = self._related_concepts_counted(
+                shared_concepts, concept_rank, papers_by_concept, similarity_threshold)
+        elif self._use_dense_kernel(shared_concepts, len(concept_rank)):
+            related_pairs = self._related_concepts_dense(
+                shared_concepts, concept_rank, papers_by_concept, similarity_threshold)
+        elif sparse is not None:
+            related_pairs = self._related_concepts_sparse(
+                shared_concepts, concept_rank, papers_by_concept, similarity_threshold)
+        else:
+            related_pairs = self._related_concepts_counted(
+                shared_concepts, concept_rank, papers_by_concept, similarity_threshold)
         
         relationships_added = 0
         
-        # For each pair of concepts
-        for i, (concept1, data1) in enumerate(concepts):
-            for concept2, data2 in concepts[i+1:]:
-                # Find papers discussing both concepts
-                papers1 = set(self._get_papers_discussing_concept(concept1))
-                papers2 = set(self._get_papers_discussing_concept(concept2))
-                common_papers = papers1 & papers2
-                
-                if common_papers:
-                    # Calculate similarity based on co-occurrence
-                    similarity = len(common_papers) / min(len(papers1), len(papers2))
-                    
-                    if similarity >= similarity_threshold:
-                        # Add related edge
-                        self._add_edge(EdgeSchema(
-                            source_id=concept1,
-                            target_id=concept2,
-                            edge_type=EdgeType.RELATED_TO,
-                            properties={'similarity_score': similarity}
-                        ))
-                        relationships_added += 1
+        for concept1, concept2, similarity in related_pairs:
+            # Add related edge
+            self._add_edge(EdgeSchema(
+                source_id=concept1,
+                target_id=concept2,
+                edge_type=EdgeType.RELATED_TO,
+                properties={'similarity_score': similarity}
+            ))
+            relationships_added += 1
         
         self.logger.info(f"Added {relationships_added} concept relationship edges")
     
+    def _related_concepts_sparse(
+        self,
+        paper_concepts: List[List[str]],
+        concept_rank: Dict[str, int],
+        papers_by_concept: Dict[str, FrozenSet[str]],
+        similarity_threshold: float
+    ) -> List[Tuple[str, str, float]]:
+        """
+        Score concept pairs from a sparse paper x concept incidence matrix
+        
+        Co-occurrence counts for all pairs come from one sparse product
+        M.T @ M; similarity is co-occurrence over the smaller concept's paper
+        count. Pairs are returned in concept rank order.
+        """
+        if not paper_concepts or not concept_rank:
+            return []
+        
+        rows, cols = [], []
+        for paper_index, concepts in enumerate(paper_concepts):
+            for concept in concepts:
+                rows.append(paper_index)
+                cols.append(concept_rank[concept])
+        
+        incidence = sparse.csr_matrix(
+            (np.ones(len(rows), dtype=np.int32), (rows, cols)),
+            shape=(len(paper_concepts), len(concept_rank))
+        )
+        papers_per_concept = np.fromiter(
+            (len(papers_by_concept.get(concept, ())) for concept in concept_rank),
+            dtype=np.int64, count=len(concept_rank)
+        )
+        cooccurrence = sparse.triu(incidence.T @ incidence, k=1).tocoo()
+        
+        order = np.lexsort((cooccurrence.col, cooccurrence.row))
+        return self._score_concept_pairs(
+            cooccurrence.row[order], cooccurrence.col[order], cooccurrence.data[order],
+            papers_per_concept, concept_rank, similarity_threshold)
+    
+    def _use_dense_kernel(self, paper_concepts: List[List[str]], num_concepts: int) -> bool:
+        """Whether the compiled bitset kernel should score this corpus"""
+        num_cells = len(paper_concepts) * num_concepts
+        if numba is None or num_cells < self.DENSE_MIN_CELLS or num_concepts > self.DENSE_MAX_CONCEPTS:
+            return False
+        num_entries = sum(len(concepts) for concepts in paper_concepts)
+        return num_entries >= self.DENSE_MIN_FILL * num_cells
+    
+    def _related_concepts_dense(
+        self,
+        paper_concepts: List[List[str]],
+        concept_rank: Dict[str, int],
+        papers_by_concept: Dict[str, FrozenSet[str]],
+        similarity_threshold: float
+    ) -> List[Tuple[str, str, float]]:
+        """
+        Score concept pairs with the numba bitset kernel
+        
+        Each concept's papers are packed 64 to a word, so a pair's
+        co-occurrence is a popcount over ANDed words. Meant for moderate
+        concept counts with many concepts per paper, where the sparse
+        product loses its advantage.
+        """
+        num_concepts = len(concept_rank)
+        rows, cols = [], []
+        for paper_index, concepts in enumerate(paper_concepts):
+            for concept in concepts:
+                rows.append(paper_index)
+                cols.append(concept_rank[concept])
+        rows = np.asarray(rows, dtype=np.uint64)
+        
+        bits = np.zeros((num_concepts, (len(paper_concepts) + 63) // 64), dtype=np.uint64)
+        np.bitwise_or.at(
+            bits,
+            (np.asarray(cols), (rows >> np.uint64(6)).astype(np.intp)),
+            np.left_shift(np.uint64(1), rows & np.uint64(63))
+        )
+        
+        cooccurrence = np.zeros((num_concepts, num_concepts), dtype=np.uint32)
+        _bitset_cooccurrence(bits, cooccurrence)
+        
+        papers_per_concept = np.fromiter(
+            (len(papers_by_concept.get(concept, ())) for concept in concept_rank),
+            dtype=np.int64, count=num_concepts
+        )
+        first, second = np.nonzero(cooccurrence)  # row-major, so already in rank order
+        return self._score_concept_pairs(
+            first, second, cooccurrence[first, second],
+            papers_per_concept, concept_rank, similarity_threshold)
+    
+    def _score_concept_pairs(
+        self,
+        first: 'np.ndarray',
+        second: 'np.ndarray',
+        counts: 'np.ndarray',
+        papers_per_concept: 'np.ndarray',
+        concept_rank: Dict[str, int],
+        similarity_threshold: float
+    ) -> List[Tuple[str, str, float]]:
+        """Turn co-occurrence counts for concept index pairs into thresholded similarities"""
+        similarity = counts / np.minimum(papers_per_concept[first], papers_per_concept[second])
+        keep = (counts > 0) & (similarity >= similarity_threshold)
+        
+        concepts = list(concept_rank)
+        return [
+            (concepts[i], concepts[j], float(score))
+            for i, j, score in zip(first[keep], second[keep], similarity[keep])
+        ]
+    
+    def _related_concepts_counted(
+        self,
+        paper_concepts: List[List[str]],
+        concept_rank: Dict[str, int],
+        papers_by_concept: Dict[str, FrozenSet[str]],
+        similarity_threshold: float
+    ) -> List[Tuple[str, str, float]]:
+        """Score concept pairs by counting co-occurrences paper by paper (no scipy)"""
+        pair_counts = Counter()
+        for concepts in paper_concepts:
+            pair_counts.update(combinations(concepts, 2))
+        
+        related = []
+        for (concept1, concept2), num_papers in sorted(
+            pair_counts.items(),
+            key=lambda item: (concept_rank[item[0][0]], concept_rank[item[0][1]])
+        ):
+            similarity = num_papers / min(len(papers_by_concept[concept1]),
+                                          len(papers_by_concept[concept2]))
+            if similarity >= similarity_threshold:
+                related.append((concept1, concept2, similarity))
+        return related
+    
     def get_statistics(self) -> GraphStatistics:
         """Get statistics about the knowledge graph"""
         stats = GraphStatistics()
@@ -240,27 +587,31 @@ class KnowledgeGraphBuilder:
         stats.num_nodes = self.graph.number_of_nodes()
         stats.num_edges = self.graph.number_of_edges()
         
-        # Count by node type
-        for node, data in self.graph.nodes(data=True):
-            node_type = data.get('node_type', 'unknown')
-            stats.node_type_counts[node_type] = stats.node_type_counts.get(node_type, 0) + 1
+        # Count by node type from the type index; nodes created implicitly by
+        # edges carry no type
+        for node_type, nodes in self._nodes_by_type.items():
+            if nodes:
+                stats.node_type_counts[node_type] = len(nodes)
+        untyped = stats.num_nodes - sum(stats.node_type_counts.values())
+        if untyped:
+            stats.node_type_counts['unknown'] = untyped
         
-        # Count by edge type
-        for source, target, data in self.graph.edges(data=True):
-            edge_type = data.get('edge_type', 'unknown')
-            stats.edge_type_counts[edge_type] = stats.edge_type_counts.get(edge_type, 0) + 1
+        # Count by edge type in a single pass over the scalar attribute
+        stats.edge_type_counts = dict(Counter(
+            edge_type for _, _, edge_type in self.graph.edges(data='edge_type', default='unknown')
+        ))
         
         # Calculate graph metrics
         if stats.num_nodes > 0:
-            stats.avg_degree = sum(dict(self.graph.degree()).values()) / stats.num_nodes
+            # Every edge adds one to the degree of each endpoint
+            stats.avg_degree = 2 * stats.num_edges / stats.num_nodes
             
             # Density
             max_edges = stats.num_nodes * (stats.num_nodes - 1)
             stats.density = stats.num_edges / max_edges if max_edges > 0 else 0
             
-            # Connected components
-            undirected = self.graph.to_undirected()
-            stats.num_connected_components = nx.number_connected_components(undirected)
+            # Connected components, without building an undirected copy
+            stats.num_connected_components = nx.number_weakly_connected_components(self.graph)
         
         return stats
     
@@ -269,53 +620,64 @@ class KnowledgeGraphBuilder:
         output_path = Path(output_path)
         output_path.parent.mkdir(exist_ok=True, parents=True)
         
-        # Create a copy of the graph with serialized complex attributes
-        g_copy = self.graph.copy()
-        
-        for node, data in g_copy.nodes(data=True):
-            for key, value in list(data.items()):
-                if isinstance(value, (dict, list)):
-                    data[key] = json.dumps(value)
+        # GraphML only holds scalars, so complex attributes are JSON-encoded
+        # in place for the write and restored afterwards instead of copying
+        # the whole graph
+        replaced = []
+        attr_dicts = chain(
+            (data for _, data in self.graph.nodes(data=True)),
+            (data for _, _, data in self.graph.edges(data=True))
+        )
         
-        for source, target, key, data in g_copy.edges(data=True, keys=True):
-            for attr_key, value in list(data.items()):
-                if isinstance(value, (dict, list)):
-                    data[attr_key] = json.dumps(value)
+        try:
+            for data in attr_dicts:
+                for key, value in data.items():
+                    if isinstance(value, (dict, list)):
+                        replaced.append((data, key, value))
+                        data[key] = json.dumps(value)
+            
+            nx.write_graphml(self.graph, str(output_path))
+        finally:
+            for data, key, value in replaced:
+                data[key] = value
         
-        nx.write_graphml(g_copy, str(output_path))
         self.logger.info(f"Exported knowledge graph to {output_path}")
     
     def export_to_json(self, output_path: Path):
-        """Export knowledge graph to JSON format"""
+        """
+        Export knowledge graph to JSON format
+        
+        Nodes and edges are serialized one at a time and streamed to the
+        file, so the whole graph is never held as a single dict or string.
+        """
         output_path = Path(output_path)
         output_path.parent.mkdir(exist_ok=True, parents=True)
         
-        # Convert to JSON-serializable format
-        data = {
-            'nodes': [],
-            'edges': []
-        }
-        
-        # Export nodes
-        for node, attrs in self.graph.nodes(data=True):
-            node_data = {'id': node}
-            node_data.update(attrs)
-            data['nodes'].append(node_data)
-        
-        # Export edges
-        for source, target, attrs in self.graph.edges(data=True):
-            edge_data = {
-                'source': source,
-                'target': target
-            }
-            edge_data.update(attrs)
-            data['edges'].append(edge_data)
+        nodes = (
+            {'id': node, **attrs}
+            for node, attrs in self.graph.nodes(data=True)
+        )
+        edges = (
+            {'source': source, 'target': target, **attrs}
+            for source, target, attrs in self.graph.edges(data=True)
+        )
         
-        with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+        with open(output_path, 'wb') as f:
+            f.write(b'{\n"nodes": [\n')
+            self._write_json_items(f, nodes)
+            f.write(b'\n],\n"edges": [\n')
+            self._write_json_items(f, edges)
+            f.write(b'\n]\n}\n')
         
         self.logger.info(f"Exported knowledge graph to {output_path}")
     
+    def _write_json_items(self, f, items: Iterable[Dict]):
+        """Write JSON objects separated by commas, one per line"""
+        for index, item in enumerate(items):
+            if index:
+                f.write(b',\n')
+            f.write(_dump_json(item))
+    
     # Internal helper methods
     
     def _add_node(self, node: NodeSchema):
@@ -326,15 +688,56 @@ class KnowledgeGraphBuilder:
             self.logger.warning(f"Invalid node {node.node_id}: {error}")
             return
         
+        node_type = node.node_type.value
+        
         # Check if node already exists
         if self.graph.has_node(node.node_id):
             # Update properties instead of creating duplicate
             existing_props = self.graph.nodes[node.node_id]
-            existing_props.update(node.properties)
+            self._track_node_type(node.node_id, node_type, existing_props.get('node_type'))
+            existing_props.update(node.to_storage_dict())
         else:
             # Add new node
-            self.graph.add_node(node.node_id, **node.properties)
-            self._node_index[node.node_id] = node.node_type.value
+            self.graph.add_node(node.node_id, **node.to_storage_dict())
+            self._node_index[node.node_id] = node_type
+            self._track_node_type(node.node_id, node_type, None)
+        self.version += 1
+    
+    def _add_nodes_bulk(self, nodes: List[NodeSchema]):
+        """Validate nodes and add or update them with one add_nodes_from call"""
+        valid_nodes = []
+        batch_types: Dict[str, str] = {}  # node_id -> latest node_type in this batch
+        
+        for node in nodes:
+            is_valid, error = validate_node(node)
+            if not is_valid:
+                self.logger.warning(f"Invalid node {node.node_id}: {error}")
+                continue
+            
+            node_type = node.node_type.value
+            if node.node_id in batch_types:
+                previous_type = batch_types[node.node_id]
+            elif self.graph.has_node(node.node_id):
+                previous_type = self.graph.nodes[node.node_id].get('node_type')
+            else:
+                previous_type = None
+                self._node_index[node.node_id] = node_type
+            
+            self._track_node_type(node.node_id, node_type, previous_type)
+            batch_types[node.node_id] = node_type
+            valid_nodes.append((node.node_id, node.to_storage_dict()))
+        
+        # Existing nodes have their attributes updated, as in _add_node
+        self.graph.add_nodes_from(valid_nodes)
+        self.version += 1
+    
+    def _track_node_type(self, node_id: str, node_type: str, previous_type: Optional[str]):
+        """File a node under its type, moving it if its type changed"""
+        if previous_type == node_type:
+            return
+        if previous_type in self._nodes_by_type:
+            self._nodes_by_type[previous_type].pop(node_id, None)
+        self._nodes_by_type[node_type][node_id] = None
     
     def _add_edge(self, edge: EdgeSchema):
         """Add an edge to the graph (with validation)"""
@@ -344,12 +747,46 @@ class KnowledgeGraphBuilder:
             self.logger.warning(f"Invalid edge: {error}")
             return
         
-        # Add edge (MultiDiGraph allows multiple edges between same nodes)
+        # Add edge keyed by its type; repeating a relation updates its
+        # properties instead of stacking a duplicate edge
+        edge_type = edge.edge_type.value
+        is_new = not self.graph.has_edge(edge.source_id, edge.target_id, key=edge_type)
         self.graph.add_edge(
             edge.source_id,
             edge.target_id,
-            **edge.properties
+            key=edge_type,
+            **edge.to_storage_dict()
         )
+        if is_new:
+            self._index_edge(edge)
+        self.version += 1
+    
+    def _add_edges_bulk(self, edges: List[EdgeSchema]):
+        """Validate edges and add them with one add_edges_from call"""
+        valid_edges = []
+        batch_edges = set()
+        
+        for edge in edges:
+            is_valid, error = validate_edge(edge)
+            if not is_valid:
+                self.logger.warning(f"Invalid edge: {error}")
+                continue
+            
+            edge_type = edge.edge_type.value
+            edge_key = (edge.source_id, edge.target_id, edge_type)
+            if edge_key not in batch_edges and not self.graph.has_edge(*edge_key):
+                self._index_edge(edge)
+            batch_edges.add(edge_key)
+            valid_edges.append((edge.source_id, edge.target_id, edge_type, edge.to_storage_dict()))
+        
+        # Existing edges of the same type have their attributes updated
+        self.graph.add_edges_from(valid_edges)
+        self.version += 1
+    
+    def _index_edge(self, edge: EdgeSchema):
+        """Record an edge in the reverse index and drop stale cached paper sets"""
+        self._rev_by_type[edge.edge_type.value][edge.target_id].append(edge.source_id)
+        self._entity_papers.pop(edge.edge_type.value, None)
     
     def _generate_paper_id(self, paper_data: Dict) -> str:
         """Generate unique ID for paper"""
@@ -357,23 +794,26 @@ class KnowledgeGraphBuilder:
             return f"paper_{paper_data['doi'].replace('/', '_')}"
         elif 'title' in paper_data:
             # Use first 50 chars of title
-            title_slug = paper_data['title'][:50].lower().replace(' ', '_')
+            title_slug = slugify(paper_data['title'][:50])
             return f"paper_{title_slug}"
         else:
             return f"paper_unknown_{hash(str(paper_data)) % 10000}"
     
+    def _papers_by_entity(self, edge_type: str) -> Dict[str, FrozenSet[str]]:
+        """Distinct sources per target for one edge type, cached until it changes"""
+        papers = self._entity_papers.get(edge_type)
+        if papers is None:
+            papers = {
+                target: frozenset(sources)
+                for target, sources in self._rev_by_type[edge_type].items()
+            }
+            self._entity_papers[edge_type] = papers
+        return papers
+    
     def _get_papers_by_author(self, author_id: str) -> List[str]:
         """Get all papers authored by a given author"""
-        papers = []
-        for source, target, data in self.graph.in_edges(author_id, data=True):
-            if data.get('edge_type') == EdgeType.AUTHORED_BY.value:
-                papers.append(source)
-        return papers
+        return list(self._rev_by_type[EdgeType.AUTHORED_BY.value].get(author_id, ()))
     
     def _get_papers_discussing_concept(self, concept_id: str) -> List[str]:
         """Get all papers discussing a given concept"""
-        papers = []
-        for source, target, data in self.graph.in_edges(concept_id, data=True):
-            if data.get('edge_type') == EdgeType.DISCUSSES_CONCEPT.value:
-                papers.append(source)
-        return papers
+        return list(self._rev_by_type[EdgeType.DISCUSSES_CONCEPT.value].get(concept_id, ()))
@@ -3,11 +3,14 @@ Knowledge Graph Query Interface
 Provides powerful querying capabilities for the research knowledge graph
 """
 import networkx as nx
+import heapq
 import logging
-from typing import List, Dict, Optional, Set, Tuple, Any
-from collections import defaultdict
+from operator import itemgetter
+from typing import List, Dict, Optional, Set, Tuple, Any, Iterator
+from collections import OrderedDict, defaultdict, deque
+from itertools import islice
 
-from .schema import NodeType, EdgeType
+from .schema import NodeType, EdgeType, slugify
 
 logger = logging.getLogger(__name__)
 
@@ -15,15 +18,26 @@ logger = logging.getLogger(__name__)
 class KnowledgeGraphQuery:
     """Query interface for knowledge graph"""
     
-    def __init__(self, graph: nx.MultiDiGraph):
+    # Number of sources whose BFS predecessor maps are kept
+    PATH_CACHE_SIZE = 64
+    
+    def __init__(self, graph: nx.MultiDiGraph, builder: Optional[Any] = None):
         """
         Initialize query interface
         
         Args:
             graph: Knowledge graph (NetworkX MultiDiGraph)
+            builder: KnowledgeGraphBuilder that owns the graph, if any; its
+                version tells when cached shortest paths are stale
         """
         self.graph = graph
+        self.builder = builder
         self.logger = logger
+        
+        # source_id -> {node_id: predecessor on a shortest path from the source},
+        # valid for the recorded graph version
+        self._path_cache: OrderedDict = OrderedDict()
+        self._path_cache_version: Any = None
     
     # Paper Queries
     
@@ -32,13 +46,14 @@ class KnowledgeGraphQuery:
         papers = []
         
         # Find author node
-        author_id = f"author_{author_name.lower().replace(' ', '_')}"
+        author_id = f"author_{slugify(author_name)}"
         if not self.graph.has_node(author_id):
             return []
         
         # Find papers with AUTHORED_BY edge
-        for source, target, data in self.graph.in_edges(author_id, data=True):
-            if data.get('edge_type') == EdgeType.AUTHORED_BY.value:
+        wanted = EdgeType.AUTHORED_BY.value
+        for source, _, edge_type in self.graph.in_edges(author_id, data='edge_type'):
+            if edge_type == wanted:
                 paper_data = self.graph.nodes[source]
                 papers.append({'paper_id': source, **paper_data})
         
@@ -48,14 +63,17 @@ class KnowledgeGraphQuery:
         """Find papers discussing a specific concept"""
         papers = []
         
-        concept_id = f"concept_{concept.lower().replace(' ', '_')}"
+        concept_id = f"concept_{slugify(concept)}"
         if not self.graph.has_node(concept_id):
             return []
         
         # Find papers with DISCUSSES_CONCEPT edge
-        for source, target, data in self.graph.in_edges(concept_id, data=True):
-            if data.get('edge_type') == EdgeType.DISCUSSES_CONCEPT.value:
-                frequency = data.get('frequency', 1)
+        # Only matching edges have their attribute dict looked up
+        wanted = EdgeType.DISCUSSES_CONCEPT.value
+        edges = self.graph.in_edges(concept_id, keys=True, data='edge_type')
+        for source, target, key, edge_type in edges:
+            if edge_type == wanted:
+                frequency = self.graph[source][target][key].get('frequency', 1)
                 if frequency >= min_frequency:
                     paper_data = self.graph.nodes[source]
                     papers.append({
@@ -72,12 +90,13 @@ class KnowledgeGraphQuery:
         """Find papers using a specific method"""
         papers = []
         
-        method_id = f"method_{method.lower().replace(' ', '_')}"
+        method_id = f"method_{slugify(method)}"
         if not self.graph.has_node(method_id):
             return []
         
-        for source, target, data in self.graph.in_edges(method_id, data=True):
-            if data.get('edge_type') == EdgeType.USES_METHOD.value:
+        wanted = EdgeType.USES_METHOD.value
+        for source, _, edge_type in self.graph.in_edges(method_id, data='edge_type'):
+            if edge_type == wanted:
                 paper_data = self.graph.nodes[source]
                 papers.append({'paper_id': source, **paper_data})
         
@@ -87,12 +106,13 @@ class KnowledgeGraphQuery:
         """Find papers using a specific dataset"""
         papers = []
         
-        dataset_id = f"dataset_{dataset.lower().replace(' ', '_')}"
+        dataset_id = f"dataset_{slugify(dataset)}"
         if not self.graph.has_node(dataset_id):
             return []
         
-        for source, target, data in self.graph.in_edges(dataset_id, data=True):
-            if data.get('edge_type') == EdgeType.USES_DATASET.value:
+        wanted = EdgeType.USES_DATASET.value
+        for source, _, edge_type in self.graph.in_edges(dataset_id, data='edge_type'):
+            if edge_type == wanted:
                 paper_data = self.graph.nodes[source]
                 papers.append({'paper_id': source, **paper_data})
         
@@ -117,26 +137,30 @@ class KnowledgeGraphQuery:
         
         if relation_types is None:
             relation_types = [EdgeType.CITES, EdgeType.SIMILAR_TO]
-        relation_type_values = [rt.value for rt in relation_types]
+        relation_type_values = frozenset(rt.value for rt in relation_types)
+        
+        # Bind hot lookups once for the traversal
+        paper_type = NodeType.PAPER.value
+        nodes = self.graph.nodes
+        out_edges = self.graph.out_edges
         
         related = []
         visited = {paper_id}
         
         # BFS to find related papers
-        queue = [(paper_id, 0)]
+        queue = deque([(paper_id, 0)])
         
         while queue:
-            current, depth = queue.pop(0)
+            current, depth = queue.popleft()
             
             if depth >= max_depth:
                 continue
             
             # Check outgoing edges
-            for source, target, data in self.graph.out_edges(current, data=True):
-                edge_type = data.get('edge_type')
+            for _, target, edge_type in out_edges(current, data='edge_type'):
                 if edge_type in relation_type_values and target not in visited:
-                    if self.graph.nodes[target].get('node_type') == NodeType.PAPER.value:
-                        paper_data = self.graph.nodes[target]
+                    paper_data = nodes[target]
+                    if paper_data.get('node_type') == paper_type:
                         related.append({
                             'paper_id': target,
                             'relation': edge_type,
@@ -152,20 +176,22 @@ class KnowledgeGraphQuery:
     
     def get_author_collaboration_network(self, author_name: str) -> Dict:
         """Get collaboration network for an author"""
-        author_id = f"author_{author_name.lower().replace(' ', '_')}"
+        author_id = f"author_{slugify(author_name)}"
         if not self.graph.has_node(author_id):
             return {'author': author_name, 'num_collaborators': 0, 'collaborators': []}
         
         collaborators = []
         
         # Find direct collaborators
-        for source, target, data in self.graph.out_edges(author_id, data=True):
-            if data.get('edge_type') == EdgeType.COLLABORATES_WITH.value:
+        wanted = EdgeType.COLLABORATES_WITH.value
+        edges = self.graph.out_edges(author_id, keys=True, data='edge_type')
+        for source, target, key, edge_type in edges:
+            if edge_type == wanted:
                 collab_data = self.graph.nodes[target]
                 collaborators.append({
                     'author_id': target,
                     'name': collab_data.get('name', 'Unknown'),
-                    'num_papers': data.get('num_papers', 0)
+                    'num_papers': self.graph[source][target][key].get('num_papers', 0)
                 })
         
         return {
@@ -180,16 +206,13 @@ class KnowledgeGraphQuery:
         author_papers = defaultdict(int)
         
         # Count papers for each author
-        for source, target, data in self.graph.edges(data=True):
-            if data.get('edge_type') == EdgeType.AUTHORED_BY.value:
+        wanted = EdgeType.AUTHORED_BY.value
+        for _, target, edge_type in self.graph.edges(data='edge_type'):
+            if edge_type == wanted:
                 author_papers[target] += 1
         
-        # Sort by paper count
-        sorted_authors = sorted(
-            author_papers.items(),
-            key=lambda x: x[1],
-            reverse=True
-        )[:top_n]
+        # Take the top N by paper count
+        sorted_authors = heapq.nlargest(top_n, author_papers.items(), key=itemgetter(1))
         
         result = []
         for author_id, paper_count in sorted_authors:
@@ -209,16 +232,13 @@ class KnowledgeGraphQuery:
         concept_freq = defaultdict(int)
         
         # Sum frequencies for each concept
-        for source, target, data in self.graph.edges(data=True):
-            if data.get('edge_type') == EdgeType.DISCUSSES_CONCEPT.value:
-                concept_freq[target] += data.get('frequency', 1)
+        wanted = EdgeType.DISCUSSES_CONCEPT.value
+        for source, target, key, edge_type in self.graph.edges(keys=True, data='edge_type'):
+            if edge_type == wanted:
+                concept_freq[target] += self.graph[source][target][key].get('frequency', 1)
         
-        # Sort by frequency
-        sorted_concepts = sorted(
-            concept_freq.items(),
-            key=lambda x: x[1],
-            reverse=True
-        )[:top_n]
+        # Take the top N by frequency
+        sorted_concepts = heapq.nlargest(top_n, concept_freq.items(), key=itemgetter(1))
         
         result = []
         for concept_id, total_freq in sorted_concepts:
@@ -234,16 +254,18 @@ class KnowledgeGraphQuery:
     
     def get_related_concepts(self, concept: str, similarity_threshold: float = 0.3) -> List[Dict]:
         """Find concepts related to a given concept"""
-        concept_id = f"concept_{concept.lower().replace(' ', '_')}"
+        concept_id = f"concept_{slugify(concept)}"
         if not self.graph.has_node(concept_id):
             return []
         
         related = []
         
         # Find concepts with RELATED_TO edge
-        for source, target, data in self.graph.out_edges(concept_id, data=True):
-            if data.get('edge_type') == EdgeType.RELATED_TO.value:
-                similarity = data.get('similarity_score', 0)
+        wanted = EdgeType.RELATED_TO.value
+        edges = self.graph.out_edges(concept_id, keys=True, data='edge_type')
+        for source, target, key, edge_type in edges:
+            if edge_type == wanted:
+                similarity = self.graph[source][target][key].get('similarity_score', 0)
                 if similarity >= similarity_threshold:
                     concept_data = self.graph.nodes[target]
                     related.append({
@@ -263,16 +285,13 @@ class KnowledgeGraphQuery:
         citation_counts = defaultdict(int)
         
         # Count incoming citations
-        for source, target, data in self.graph.edges(data=True):
-            if data.get('edge_type') == EdgeType.CITES.value:
+        wanted = EdgeType.CITES.value
+        for _, target, edge_type in self.graph.edges(data='edge_type'):
+            if edge_type == wanted:
                 citation_counts[target] += 1
         
-        # Sort by citation count
-        sorted_papers = sorted(
-            citation_counts.items(),
-            key=lambda x: x[1],
-            reverse=True
-        )[:top_n]
+        # Take the top N by citation count
+        sorted_papers = heapq.nlargest(top_n, citation_counts.items(), key=itemgetter(1))
         
         result = []
         for paper_id, cite_count in sorted_papers:
@@ -285,46 +304,131 @@ class KnowledgeGraphQuery:
         
         return result
     
-    def get_citation_chain(self, paper_id: str, max_depth: int = 3) -> List[List[str]]:
-        """Get citation chains from a paper"""
-        if not self.graph.has_node(paper_id):
-            return []
+    def get_citation_chain(
+        self,
+        paper_id: str,
+        max_depth: int = 3,
+        max_chains: Optional[int] = None
+    ) -> List[List[str]]:
+        """
+        Get citation chains from a paper
         
-        chains = []
+        Args:
+            paper_id: Source paper ID
+            max_depth: Maximum number of citation hops in a chain
+            max_chains: Stop after this many chains (default: all)
+        """
+        return list(islice(self.iter_citation_chains(paper_id, max_depth), max_chains))
+    
+    def iter_citation_chains(self, paper_id: str, max_depth: int = 3) -> Iterator[List[str]]:
+        """
+        Yield citation chains from a paper one at a time
         
-        def dfs_citations(current: str, path: List[str], depth: int):
-            if depth >= max_depth:
+        Every acyclic chain of up to max_depth CITES hops starting at the
+        paper is yielded, each after the chains that extend it, so callers
+        can stop early without the rest being enumerated.
+        """
+        if not self.graph.has_node(paper_id) or max_depth <= 0:
+            return
+        
+        cites = EdgeType.CITES.value
+        out_edges = self.graph.out_edges
+        
+        def cited_by(node: str) -> Iterator[str]:
+            return (target for _, target, edge_type in out_edges(node, data='edge_type')
+                    if edge_type == cites)
+        
+        # Iterative DFS: one pending-children iterator per node on the path
+        path = [paper_id]
+        on_path = {paper_id}
+        stack = [cited_by(paper_id)]
+        
+        while stack:
+            target = next(stack[-1], None)
+            
+            if target is None:
+                # All children explored; emit the chain ending here
+                stack.pop()
                 if len(path) > 1:
-                    chains.append(path.copy())
-                return
+                    yield list(path)
+                on_path.discard(path.pop())
+                continue
             
-            # Find papers cited by current paper
-            for source, target, data in self.graph.out_edges(current, data=True):
-                if data.get('edge_type') == EdgeType.CITES.value:
-                    if target not in path:  # Avoid cycles
-                        path.append(target)
-                        dfs_citations(target, path, depth + 1)
-                        path.pop()
+            if target in on_path:  # Avoid cycles
+                continue
             
-            if len(path) > 1:
-                chains.append(path.copy())
-        
-        dfs_citations(paper_id, [paper_id], 0)
-        return chains
+            path.append(target)
+            if len(path) > max_depth:
+                yield list(path)
+                path.pop()
+            else:
+                on_path.add(target)
+                stack.append(cited_by(target))
     
     # Graph Analysis
     
     def find_shortest_path(self, source_id: str, target_id: str) -> Optional[List[str]]:
-        """Find shortest path between two nodes"""
-        try:
-            path = nx.shortest_path(self.graph, source_id, target_id)
-            return path
-        except nx.NetworkXNoPath:
+        """
+        Find shortest path between two nodes
+        
+        Each source's BFS predecessor map is computed once over the whole
+        graph and cached, so repeated queries from the same source only walk
+        back from the target. The cache is dropped when the builder's version
+        changes (or, without a builder, when the graph gains or loses nodes or
+        edges). When several shortest paths exist, any one of them is returned.
+        """
+        for node_id in (source_id, target_id):
+            if not self.graph.has_node(node_id):
+                raise nx.NodeNotFound(f"Node {node_id} is not in G")
+        
+        predecessors = self._predecessors_from(source_id)
+        if target_id != source_id and target_id not in predecessors:
             return None
+        
+        path = [target_id]
+        while path[-1] != source_id:
+            path.append(predecessors[path[-1]])
+        path.reverse()
+        return path
+    
+    def clear_path_cache(self):
+        """Forget cached shortest paths (e.g. after changing the graph outside the builder)"""
+        self._path_cache.clear()
+    
+    def _predecessors_from(self, source_id: str) -> Dict[str, str]:
+        """BFS predecessor of every node reachable from a source, LRU-cached"""
+        if self.builder is not None:
+            version = self.builder.version
+        else:
+            version = (self.graph.number_of_nodes(), self.graph.number_of_edges())
+        if version != self._path_cache_version:
+            self._path_cache.clear()
+            self._path_cache_version = version
+        
+        predecessors = self._path_cache.get(source_id)
+        if predecessors is None:
+            predecessors = dict(nx.bfs_predecessors(self.graph, source_id))
+            self._path_cache[source_id] = predecessors
+            while len(self._path_cache) > self.PATH_CACHE_SIZE:
+                self._path_cache.popitem(last=False)
+        else:
+            self._path_cache.move_to_end(source_id)
+        return predecessors
     
-    def get_subgraph_by_concept(self, concept: str) -> nx.MultiDiGraph:
-        """Extract subgraph containing papers and entities related to a concept"""
-        concept_id = f"concept_{concept.lower().replace(' ', '_')}"
+    def get_subgraph_by_concept(self, concept: str, copy: bool = False) -> nx.MultiDiGraph:
+        """
+        Extract subgraph containing papers and entities related to a concept
+        
+        Args:
+            concept: Concept name
+            copy: Return an independent graph instead of a view
+            
+        Returns:
+            By default a read-only view onto the knowledge graph: it shares
+            the node and edge attribute dicts and reflects later changes to
+            the graph. Pass copy=True for a graph that can be modified.
+        """
+        concept_id = f"concept_{slugify(concept)}"
         if not self.graph.has_node(concept_id):
             return nx.MultiDiGraph()
         
@@ -332,16 +436,17 @@ class KnowledgeGraphQuery:
         nodes_to_include = {concept_id}
         
         # Add papers discussing this concept
-        for source, target, data in self.graph.in_edges(concept_id, data=True):
-            if data.get('edge_type') == EdgeType.DISCUSSES_CONCEPT.value:
+        wanted = EdgeType.DISCUSSES_CONCEPT.value
+        for source, _, edge_type in self.graph.in_edges(concept_id, data='edge_type'):
+            if edge_type == wanted:
                 nodes_to_include.add(source)
                 
                 # Add all entities connected to these papers
-                for s, t, d in self.graph.out_edges(source, data=True):
-                    nodes_to_include.add(t)
+                nodes_to_include.update(self.graph.successors(source))
         
         # Extract subgraph
-        return self.graph.subgraph(nodes_to_include).copy()
+        subgraph = self.graph.subgraph(nodes_to_include)
+        return subgraph.copy() if copy else subgraph
     
     def get_node_details(self, node_id: str) -> Optional[Dict]:
         """Get detailed information about a node"""
@@ -351,10 +456,7 @@ class KnowledgeGraphQuery:
         node_data = dict(self.graph.nodes[node_id])
         
         # Add edge information
-        in_edges = list(self.graph.in_edges(node_id, data=True))
-        out_edges = list(self.graph.out_edges(node_id, data=True))
-        
-        node_data['in_degree'] = len(in_edges)
-        node_data['out_degree'] = len(out_edges)
+        node_data['in_degree'] = self.graph.in_degree(node_id)
+        node_data['out_degree'] = self.graph.out_degree(node_id)
         
         return node_data
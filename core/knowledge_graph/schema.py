@@ -3,9 +3,12 @@ Knowledge Graph Schema Definition
 Defines node types, edge types, and properties for the research paper knowledge graph
 """
 from enum import Enum
+from contextlib import contextmanager
 from dataclasses import dataclass, field
-from typing import List, Dict, Optional, Any
+from functools import lru_cache
+from typing import List, Dict, Optional, Any, Iterator
 from datetime import datetime
+import time
 
 
 class NodeType(Enum):
@@ -34,7 +37,48 @@ class EdgeType(Enum):
     SIMILAR_TO = "similar_to"  # Paper -> Paper (semantic similarity)
 
 
-@dataclass
+# Declaration index of each node type, for the tuple-indexed
+# _REQUIRED_PROPERTY_TABLE (Enum members hash through a Python-level __hash__)
+for _ordinal, _member in enumerate(NodeType):
+    _member._ordinal = _ordinal
+del _ordinal, _member
+
+
+# Timestamp shared by every node/edge created inside bulk_timestamp()
+_frozen_timestamp: Optional[str] = None
+
+
+@lru_cache(maxsize=1)
+def _iso_for_second(second: int) -> str:
+    """ISO timestamp of a whole second, formatted once per second"""
+    return datetime.fromtimestamp(second).isoformat()
+
+
+def _now_iso() -> str:
+    """Current time as an ISO string, at one-second resolution"""
+    if _frozen_timestamp is not None:
+        return _frozen_timestamp
+    return _iso_for_second(int(time.time()))
+
+
+@contextmanager
+def bulk_timestamp() -> Iterator[str]:
+    """
+    Give every node and edge created inside the block the same created_at
+    
+    Returns:
+        The frozen ISO timestamp
+    """
+    global _frozen_timestamp
+    previous = _frozen_timestamp
+    _frozen_timestamp = previous or _now_iso()
+    try:
+        yield _frozen_timestamp
+    finally:
+        _frozen_timestamp = previous
+
+
+@dataclass(slots=True)
 class NodeSchema:
     """Schema for a node in the knowledge graph"""
     node_id: str
@@ -44,10 +88,19 @@ class NodeSchema:
     def __post_init__(self):
         """Validate node has required properties based on type"""
         self.properties['node_type'] = self.node_type.value
-        self.properties['created_at'] = self.properties.get('created_at', datetime.now().isoformat())
+    
+    def to_storage_dict(self) -> Dict[str, Any]:
+        """
+        Properties to store in the graph, with created_at filled in
+        
+        The timestamp is only taken here, so nodes that are rejected or never
+        stored do not pay for it. Returns this node's own properties dict.
+        """
+        self.properties.setdefault('created_at', _now_iso())
+        return self.properties
 
 
-@dataclass
+@dataclass(slots=True)
 class EdgeSchema:
     """Schema for an edge in the knowledge graph"""
     source_id: str
@@ -58,12 +111,20 @@ class EdgeSchema:
     def __post_init__(self):
         """Validate edge and add metadata"""
         self.properties['edge_type'] = self.edge_type.value
-        self.properties['created_at'] = self.properties.get('created_at', datetime.now().isoformat())
+    
+    def to_storage_dict(self) -> Dict[str, Any]:
+        """
+        Properties to store in the graph, with created_at filled in
+        
+        Returns this edge's own properties dict (see NodeSchema.to_storage_dict).
+        """
+        self.properties.setdefault('created_at', _now_iso())
+        return self.properties
 
 
 # Node property schemas
 PAPER_PROPERTIES = {
-    'required': ['title', 'paper_id'],
+    'required': frozenset({'title', 'paper_id'}),
     'optional': [
         'abstract', 'year', 'doi', 'url', 'venue',
         'pdf_path', 'citation_count', 'full_text',
@@ -72,7 +133,7 @@ PAPER_PROPERTIES = {
 }
 
 AUTHOR_PROPERTIES = {
-    'required': ['name', 'author_id'],
+    'required': frozenset({'name', 'author_id'}),
     'optional': [
         'email', 'institution', 'h_index', 'citation_count',
         'research_interests', 'homepage', 'orcid'
@@ -80,7 +141,7 @@ AUTHOR_PROPERTIES = {
 }
 
 CONCEPT_PROPERTIES = {
-    'required': ['name', 'concept_id'],
+    'required': frozenset({'name', 'concept_id'}),
     'optional': [
         'description', 'category', 'frequency',
         'related_terms', 'embedding'
@@ -88,7 +149,7 @@ CONCEPT_PROPERTIES = {
 }
 
 METHOD_PROPERTIES = {
-    'required': ['name', 'method_id'],
+    'required': frozenset({'name', 'method_id'}),
     'optional': [
         'description', 'category', 'parameters',
         'use_cases', 'embedding'
@@ -96,7 +157,7 @@ METHOD_PROPERTIES = {
 }
 
 DATASET_PROPERTIES = {
-    'required': ['name', 'dataset_id'],
+    'required': frozenset({'name', 'dataset_id'}),
     'optional': [
         'description', 'url', 'size', 'format',
         'domain', 'license'
@@ -104,7 +165,7 @@ DATASET_PROPERTIES = {
 }
 
 INSTITUTION_PROPERTIES = {
-    'required': ['name', 'institution_id'],
+    'required': frozenset({'name', 'institution_id'}),
     'optional': [
         'country', 'city', 'type', 'website',
         'ranking'
@@ -112,13 +173,31 @@ INSTITUTION_PROPERTIES = {
 }
 
 VENUE_PROPERTIES = {
-    'required': ['name', 'venue_id'],
+    'required': frozenset({'name', 'venue_id'}),
     'optional': [
         'type', 'year', 'impact_factor', 'h5_index',
         'url', 'publisher'
     ]
 }
 
+# Node type -> property schema, built once for get_node_schema
+_NODE_SCHEMAS = {
+    NodeType.PAPER: PAPER_PROPERTIES,
+    NodeType.AUTHOR: AUTHOR_PROPERTIES,
+    NodeType.CONCEPT: CONCEPT_PROPERTIES,
+    NodeType.METHOD: METHOD_PROPERTIES,
+    NodeType.DATASET: DATASET_PROPERTIES,
+    NodeType.INSTITUTION: INSTITUTION_PROPERTIES,
+    NodeType.VENUE: VENUE_PROPERTIES
+}
+
+_FALLBACK_SCHEMA = {'required': frozenset({'name'}), 'optional': []}
+
+# Required properties indexed by NodeType declaration order, for validate_node
+_REQUIRED_PROPERTY_TABLE = tuple(
+    _NODE_SCHEMAS.get(node_type, _FALLBACK_SCHEMA)['required'] for node_type in NodeType
+)
+
 # Edge property schemas
 EDGE_PROPERTIES = {
     EdgeType.CITES: ['context', 'section', 'importance_score'],
@@ -135,18 +214,25 @@ EDGE_PROPERTIES = {
 }
 
 
-def get_node_schema(node_type: NodeType) -> Dict[str, List[str]]:
-    """Get property schema for a node type"""
-    schemas = {
-        NodeType.PAPER: PAPER_PROPERTIES,
-        NodeType.AUTHOR: AUTHOR_PROPERTIES,
-        NodeType.CONCEPT: CONCEPT_PROPERTIES,
-        NodeType.METHOD: METHOD_PROPERTIES,
-        NodeType.DATASET: DATASET_PROPERTIES,
-        NodeType.INSTITUTION: INSTITUTION_PROPERTIES,
-        NodeType.VENUE: VENUE_PROPERTIES
-    }
-    return schemas.get(node_type, {'required': ['name'], 'optional': []})
+# Entity ids are "<type>_<name>" with the name lowercased and spaces mapped to
+# underscores (see EntityExtractor); lower() rather than casefold() keeps the
+# ids identical to the extractor's
+_SPACE_TO_UNDERSCORE = str.maketrans({' ': '_'})
+
+
+def slugify(text: str) -> str:
+    """Lowercase text and replace spaces with underscores in one translate pass"""
+    return text.lower().translate(_SPACE_TO_UNDERSCORE)
+
+
+def get_node_schema(node_type: NodeType) -> Dict[str, Any]:
+    """
+    Get property schema for a node type
+    
+    Returns:
+        Dictionary with 'required' (frozenset) and 'optional' (list) property names
+    """
+    return _NODE_SCHEMAS.get(node_type, _FALLBACK_SCHEMA)
 
 
 def validate_node(node: NodeSchema) -> tuple[bool, Optional[str]]:
@@ -156,14 +242,16 @@ def validate_node(node: NodeSchema) -> tuple[bool, Optional[str]]:
     Returns:
         (is_valid, error_message)
     """
-    schema = get_node_schema(node.node_type)
+    required = _REQUIRED_PROPERTY_TABLE[node.node_type._ordinal]
     
-    # Check required properties
-    for prop in schema['required']:
-        if prop not in node.properties:
-            return False, f"Missing required property: {prop}"
+    # Subset test on the keys view runs in C and allocates nothing; the
+    # missing set is only built for invalid nodes
+    keys = node.properties.keys()
+    if keys >= required:
+        return True, None
     
-    return True, None
+    missing = required - keys
+    return False, f"Missing required property: {', '.join(sorted(missing))}"
 
 
 def validate_edge(edge: EdgeSchema) -> tuple[bool, Optional[str]]:
@@ -181,7 +269,7 @@ def validate_edge(edge: EdgeSchema) -> tuple[bool, Optional[str]]:
 
 
 # Graph statistics schema
-@dataclass
+@dataclass(slots=True)
 class GraphStatistics:
     """Statistics about the knowledge graph"""
     num_nodes: int = 0
@@ -25,11 +25,22 @@ class MarkerProcessor:
     2. Requires GPU for best performance
     """
     
+    # Set once the placeholder warning has been logged by any instance
+    _warned = False
+    
     def __init__(self):
         """Initialize Marker processor."""
         self.logger = logger
         logger.info("MarkerProcessor initialized (placeholder implementation)")
     
+    def _warn_placeholder(self):
+        """Log the placeholder warning on the first call only, not per PDF."""
+        cls = type(self)
+        if not cls._warned:
+            cls._warned = True
+            logger.warning("Marker library not fully integrated. This is a placeholder.")
+            logger.info("To use Marker: pip install marker-pdf")
+    
     def extract_to_markdown(self, pdf_path: str, output_path: Optional[str] = None) -> str:
         """
         Convert PDF to markdown format.
@@ -41,8 +52,7 @@ class MarkerProcessor:
         Returns:
             Markdown content
         """
-        logger.warning("Marker library not fully integrated. This is a placeholder.")
-        logger.info("To use Marker: pip install marker-pdf")
+        self._warn_placeholder()
         
         # Placeholder implementation
         markdown = f"# PDF Content from {Path(pdf_path).name}\n\n"
@@ -65,7 +75,7 @@ class MarkerProcessor:
         Returns:
             Dictionary with structured content
         """
-        logger.warning("Marker library not fully integrated. This is a placeholder.")
+        self._warn_placeholder()
         
         # Placeholder structure
         result = {
@@ -93,7 +103,7 @@ class MarkerProcessor:
         Returns:
             List of sections with titles and content
         """
-        logger.warning("Marker library not fully integrated. This is a placeholder.")
+        self._warn_placeholder()
         
         sections = [
             {
@@ -117,7 +127,7 @@ class MarkerProcessor:
         Returns:
             List of table dictionaries
         """
-        logger.warning("Marker library not fully integrated. This is a placeholder.")
+        self._warn_placeholder()
         
         tables = []
         return tables
@@ -133,7 +143,7 @@ class MarkerProcessor:
         Returns:
             List of figure dictionaries
         """
-        logger.warning("Marker library not fully integrated. This is a placeholder.")
+        self._warn_placeholder()
         
         figures = []
         return figures
@@ -148,7 +158,7 @@ class MarkerProcessor:
         Returns:
             List of equation dictionaries
         """
-        logger.warning("Marker library not fully integrated. This is a placeholder.")
+        self._warn_placeholder()
         
         equations = []
         return equations
@@ -1,19 +1,52 @@
 """PyMuPDF (fitz) PDF processor for extracting text and metadata from PDFs."""
 
+import hashlib
 import logging
-from typing import Dict, List, Optional, Any
+import os
+import pickle
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Any, Iterator, Tuple, Union
 from pathlib import Path
 import io
+import shutil
 
 try:
     import fitz  # PyMuPDF
     PYMUPDF_AVAILABLE = True
+    
+    # get_text() flags that never decode image blocks; only text is read
+    _TEXT_FLAGS = fitz.TEXTFLAGS_TEXT & ~fitz.TEXT_PRESERVE_IMAGES
 except ImportError:
     PYMUPDF_AVAILABLE = False
     fitz = None
 
 logger = logging.getLogger(__name__)
 
+# A path to a PDF file, or a fitz.Document already opened with PyMuPDFProcessor.open()
+PDFSource = Union[str, Path, Any]
+
+
+# Processor of a batch worker process, built once by _init_batch_worker
+_worker_processor: Optional['PyMuPDFProcessor'] = None
+
+
+def _init_batch_worker(cache_dir: Optional[Path]):
+    """Build one processor per worker process."""
+    global _worker_processor
+    _worker_processor = PyMuPDFProcessor(doc_cache_size=0, cache_dir=cache_dir)
+
+
+def _process_one(pdf_path: str) -> Dict[str, Any]:
+    """Extract structured content from one PDF in a batch worker process."""
+    return _worker_processor.extract_with_structure(pdf_path)
+
+
+def _page_text(page) -> Tuple[str, float, float]:
+    """Text and size of one page."""
+    return page.get_text("text", flags=_TEXT_FLAGS), page.rect.width, page.rect.height
+
 
 class PyMuPDFProcessor:
     """
@@ -21,98 +54,261 @@ class PyMuPDFProcessor:
     Fast and efficient for text extraction and basic layout analysis.
     """
     
-    def __init__(self):
-        """Initialize PyMuPDF processor."""
+    def __init__(self,
+                 doc_cache_size: int = 0,
+                 cache_dir: Optional[Path] = None):
+        """
+        Initialize PyMuPDF processor.
+        
+        Args:
+            doc_cache_size: Number of parsed documents kept open and reused
+                across calls on the same unchanged file; 0 (default) disables
+                the cache. Cached files stay open (and locked on Windows)
+                until evicted or close() is called, and the processor must
+                then not be shared between threads.
+            cache_dir: Directory for extract_text/extract_with_structure
+                results keyed by path, mtime and size (e.g. ~/.cache/ara/pdf);
+                None (default) disables the cache
+        """
         if not PYMUPDF_AVAILABLE:
             logger.warning("PyMuPDF not installed. Install with: pip install PyMuPDF")
             raise ImportError("PyMuPDF is required but not installed")
         
         self.logger = logger
+        self.doc_cache_size = doc_cache_size
+        self.cache_dir = Path(cache_dir) if cache_dir else None
+        
+        # resolved path -> ((st_mtime_ns, st_size), fitz.Document)
+        self._doc_cache: OrderedDict = OrderedDict()
+    
+    @contextmanager
+    def open(self, pdf_path: PDFSource) -> Iterator[Any]:
+        """
+        Open a PDF once for several extraction calls.
+        
+        The yielded document can be passed to any extraction method in place
+        of the path, so the file is parsed only once.
+        
+        Args:
+            pdf_path: Path to PDF file, or an already open fitz.Document
+        
+        Yields:
+            Open fitz.Document
+        """
+        if isinstance(pdf_path, fitz.Document):
+            yield pdf_path
+            return
+        
+        doc = self._open_cached(pdf_path)
+        if doc is not None:
+            # Cached documents stay open until evicted or close() is called
+            yield doc
+            return
+        
+        doc = fitz.open(pdf_path)
+        try:
+            yield doc
+        finally:
+            doc.close()
+    
+    def close(self):
+        """Close all cached documents."""
+        while self._doc_cache:
+            _, (_, doc) = self._doc_cache.popitem()
+            doc.close()
     
-    def extract_text(self, pdf_path: str) -> str:
+    def _open_cached(self, pdf_path: Union[str, Path]) -> Optional[Any]:
+        """Return a cached open document for an unchanged file, parsing it on a miss."""
+        if self.doc_cache_size <= 0:
+            return None
+        
+        path = Path(pdf_path).resolve()
+        stat = path.stat()
+        key = str(path)
+        stamp = (stat.st_mtime_ns, stat.st_size)
+        
+        cached = self._doc_cache.get(key)
+        if cached is not None:
+            cached_stamp, doc = cached
+            if cached_stamp == stamp and not doc.is_closed:
+                self._doc_cache.move_to_end(key)
+                return doc
+            del self._doc_cache[key]
+            doc.close()
+        
+        doc = fitz.open(key)
+        self._doc_cache[key] = (stamp, doc)
+        while len(self._doc_cache) > self.doc_cache_size:
+            _, (_, evicted) = self._doc_cache.popitem(last=False)
+            evicted.close()
+        return doc
+    
+    def extract_text(self, pdf_path: PDFSource, force_refresh: bool = False) -> str:
         """
         Extract plain text from PDF.
         
         Args:
-            pdf_path: Path to PDF file
+            pdf_path: Path to PDF file, or a document from open()
+            force_refresh: Ignore any cached result and re-extract
             
         Returns:
             Extracted text content
         """
+        cache_path = self._cache_path(pdf_path, 'text')
+        if cache_path is not None and not force_refresh:
+            cached_text = self._load_cached_result(cache_path)
+            if cached_text is not None:
+                logger.info(f"Loaded cached text for {pdf_path}")
+                return cached_text
+        
         try:
-            doc = fitz.open(pdf_path)
-            text = ""
+            with self.open(pdf_path) as doc:
+                num_pages = len(doc)
+                text = "".join(page_text for page_text, _, _ in self._page_texts(doc))
             
-            for page_num in range(len(doc)):
-                page = doc[page_num]
-                text += page.get_text()
-            
-            doc.close()
-            
-            logger.info(f"Extracted text from {len(doc)} pages")
+            logger.info(f"Extracted text from {num_pages} pages")
+            if cache_path is not None:
+                self._store_cached_result(cache_path, text)
             return text
             
         except Exception as e:
             logger.error(f"Error extracting text from PDF: {e}")
             return ""
     
-    def extract_with_structure(self, pdf_path: str) -> Dict[str, Any]:
+    def extract_with_structure(self, pdf_path: PDFSource, force_refresh: bool = False) -> Dict[str, Any]:
         """
         Extract text with structure (pages, sections).
         
         Args:
-            pdf_path: Path to PDF file
+            pdf_path: Path to PDF file, or a document from open()
+            force_refresh: Ignore any cached result and re-extract
             
         Returns:
             Dictionary with structured content
         """
+        cache_path = self._cache_path(pdf_path, 'structure')
+        if cache_path is not None and not force_refresh:
+            cached_result = self._load_cached_result(cache_path)
+            if cached_result is not None:
+                logger.info(f"Loaded cached structured content for {pdf_path}")
+                return cached_result
+        
         try:
-            doc = fitz.open(pdf_path)
-            
-            result = {
-                'metadata': self._extract_metadata(doc),
-                'pages': [],
-                'full_text': '',
-                'num_pages': len(doc)
-            }
-            
-            for page_num in range(len(doc)):
-                page = doc[page_num]
-                page_text = page.get_text()
-                
-                page_data = {
-                    'page_number': page_num + 1,
-                    'text': page_text,
-                    'width': page.rect.width,
-                    'height': page.rect.height
+            with self.open(pdf_path) as doc:
+                num_pages = len(doc)
+                result = {
+                    'metadata': self._extract_metadata(doc),
+                    'pages': [],
+                    'full_text': '',
+                    'num_pages': num_pages
                 }
                 
-                result['pages'].append(page_data)
-                result['full_text'] += page_text + '\n\n'
-            
-            doc.close()
+                for page_num, (page_text, width, height) in enumerate(self._page_texts(doc)):
+                    page_data = {
+                        'page_number': page_num + 1,
+                        'text': page_text,
+                        'width': width,
+                        'height': height
+                    }
+                    
+                    result['pages'].append(page_data)
+                
+                # Joined once; every page is followed by a blank line
+                result['full_text'] = ''.join(page['text'] + '\n\n' for page in result['pages'])
             
-            logger.info(f"Extracted structured content from {len(doc)} pages")
+            logger.info(f"Extracted structured content from {num_pages} pages")
+            if cache_path is not None:
+                self._store_cached_result(cache_path, result)
             return result
             
         except Exception as e:
             logger.error(f"Error extracting structured content: {e}")
             return {}
     
-    def extract_metadata(self, pdf_path: str) -> Dict[str, Any]:
+    def process_batch(self, pdf_paths: List[str], workers: Optional[int] = None) -> Dict[str, Dict[str, Any]]:
+        """
+        Extract structured content from many PDFs in parallel worker processes.
+        
+        Args:
+            pdf_paths: Paths to PDF files
+            workers: Number of worker processes (defaults to CPU count)
+            
+        Returns:
+            Dictionary mapping each PDF path to its extract_with_structure result
+        """
+        pdf_paths = [str(p) for p in pdf_paths]
+        if not pdf_paths:
+            return {}
+        
+        workers = min(workers or os.cpu_count() or 1, len(pdf_paths))
+        if workers <= 1:
+            return {path: self.extract_with_structure(path) for path in pdf_paths}
+        
+        chunksize = max(1, len(pdf_paths) // (4 * workers))
+        logger.info(f"Processing {len(pdf_paths)} PDFs with {workers} workers")
+        
+        with ProcessPoolExecutor(max_workers=workers,
+                                 initializer=_init_batch_worker,
+                                 initargs=(self.cache_dir,)) as executor:
+            results = executor.map(_process_one, pdf_paths, chunksize=chunksize)
+            return dict(zip(pdf_paths, results))
+    
+    def _cache_path(self, pdf_path: PDFSource, kind: str) -> Optional[Path]:
+        """Cache file for this kind of result of an unchanged file, or None"""
+        if self.cache_dir is None or not isinstance(pdf_path, (str, Path)):
+            return None
+        
+        try:
+            path = Path(pdf_path).resolve()
+            stat = path.stat()
+        except OSError as e:
+            logger.debug(f"Could not stat {pdf_path} for extraction cache: {e}")
+            return None
+        
+        key = f"{path}:{stat.st_mtime_ns}:{stat.st_size}:{kind}"
+        digest = hashlib.blake2b(key.encode('utf-8'), digest_size=16).hexdigest()
+        return self.cache_dir / f"{digest}.pkl"
+    
+    def _load_cached_result(self, cache_path: Path) -> Optional[Any]:
+        """Load a pickled result, or None on a miss or unreadable entry"""
+        if not cache_path.exists():
+            return None
+        try:
+            with open(cache_path, 'rb') as f:
+                return pickle.load(f)
+        except Exception as e:
+            logger.warning(f"Ignoring unreadable extraction cache {cache_path}: {e}")
+            return None
+    
+    def _store_cached_result(self, cache_path: Path, result: Any):
+        """Pickle a result atomically so concurrent readers never see partial files"""
+        tmp_path = cache_path.with_suffix(f'.{os.getpid()}.tmp')
+        try:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            with open(tmp_path, 'wb') as f:
+                pickle.dump(result, f, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(tmp_path, cache_path)
+        except Exception as e:
+            logger.warning(f"Could not write extraction cache {cache_path}: {e}")
+            tmp_path.unlink(missing_ok=True)
+    
+    def _page_texts(self, doc) -> List[Tuple[str, float, float]]:
+        """Extract (text, width, height) of every page, in page order."""
+        return [_page_text(doc.load_page(page_num)) for page_num in range(len(doc))]
+    
+    def extract_metadata(self, pdf_path: PDFSource) -> Dict[str, Any]:
         """
         Extract PDF metadata.
         
         Args:
-            pdf_path: Path to PDF file
+            pdf_path: Path to PDF file, or a document from open()
             
         Returns:
             Dictionary with metadata
         """
         try:
-            doc = fitz.open(pdf_path)
-            metadata = self._extract_metadata(doc)
-            doc.close()
+            with self.open(pdf_path) as doc:
+                metadata = self._extract_metadata(doc)
             return metadata
             
         except Exception as e:
@@ -144,12 +340,12 @@ class PyMuPDFProcessor:
         
         return metadata
     
-    def extract_images(self, pdf_path: str, output_dir: Optional[str] = None) -> List[Dict[str, Any]]:
+    def extract_images(self, pdf_path: PDFSource, output_dir: Optional[str] = None) -> List[Dict[str, Any]]:
         """
         Extract images from PDF.
         
         Args:
-            pdf_path: Path to PDF file
+            pdf_path: Path to PDF file, or a document from open()
             output_dir: Optional directory to save images
             
         Returns:
@@ -157,40 +353,61 @@ class PyMuPDFProcessor:
         """
         images = []
         
+        # xref -> (width, height, ext, size, first saved file) of images
+        # already extracted; repeated images (logos, headers) are not
+        # decoded into Python bytes again
+        seen: Dict[int, tuple] = {}
+        
         try:
-            doc = fitz.open(pdf_path)
-            
-            for page_num in range(len(doc)):
-                page = doc[page_num]
-                image_list = page.get_images()
-                
-                for img_index, img in enumerate(image_list):
-                    xref = img[0]
-                    base_image = doc.extract_image(xref)
+            output_path = None
+            if output_dir:
+                output_path = Path(output_dir)
+                output_path.mkdir(parents=True, exist_ok=True)
+            
+            with self.open(pdf_path) as doc:
+                for page_num in range(len(doc)):
+                    # Drop the page as soon as its image list is read
+                    page = doc.load_page(page_num)
+                    image_list = page.get_images()
+                    page = None
                     
-                    image_info = {
-                        'page': page_num + 1,
-                        'index': img_index,
-                        'width': base_image['width'],
-                        'height': base_image['height'],
-                        'format': base_image['ext'],
-                        'size': len(base_image['image'])
-                    }
-                    
-                    # Save image if output directory provided
-                    if output_dir:
-                        output_path = Path(output_dir)
-                        output_path.mkdir(parents=True, exist_ok=True)
+                    for img_index, img in enumerate(image_list):
+                        xref = img[0]
+                        data = None
+                        if xref in seen:
+                            width, height, ext, size, first_file = seen[xref]
+                        else:
+                            base_image = doc.extract_image(xref)
+                            width, height = base_image['width'], base_image['height']
+                            ext, data = base_image['ext'], base_image['image']
+                            size, first_file = len(data), None
+                            base_image = None
                         
-                        image_filename = output_path / f"page{page_num+1}_img{img_index}.{base_image['ext']}"
-                        with open(image_filename, 'wb') as f:
-                            f.write(base_image['image'])
+                        image_info = {
+                            'page': page_num + 1,
+                            'index': img_index,
+                            'width': width,
+                            'height': height,
+                            'format': ext,
+                            'size': size
+                        }
                         
-                        image_info['saved_path'] = str(image_filename)
-                    
-                    images.append(image_info)
-            
-            doc.close()
+                        # Save image if output directory provided
+                        if output_path is not None:
+                            image_filename = output_path / f"page{page_num+1}_img{img_index}.{ext}"
+                            if data is not None:
+                                with open(image_filename, 'wb') as f:
+                                    f.write(data)
+                                first_file = image_filename
+                            else:
+                                # Copied file-to-file by the OS
+                                shutil.copyfile(first_file, image_filename)
+                            
+                            image_info['saved_path'] = str(image_filename)
+                        
+                        seen[xref] = (width, height, ext, size, first_file)
+                        data = None
+                        images.append(image_info)
             
             logger.info(f"Extracted {len(images)} images from PDF")
             
@@ -199,12 +416,17 @@ class PyMuPDFProcessor:
         
         return images
     
-    def extract_tables(self, pdf_path: str) -> List[Dict[str, Any]]:
+    def extract_tables(self, pdf_path: PDFSource, detect_tables: bool = False) -> List[Dict[str, Any]]:
         """
         Extract tables from PDF (basic implementation).
         
+        By default every text block is reported as a potential table region.
+        With detect_tables, PyMuPDF's find_tables() (PyMuPDF >= 1.23) locates
+        actual tables and their cell rows; it is far slower per page.
+        
         Args:
-            pdf_path: Path to PDF file
+            pdf_path: Path to PDF file, or a document from open()
+            detect_tables: Use find_tables() when available
             
         Returns:
             List of table dictionaries
@@ -212,26 +434,37 @@ class PyMuPDFProcessor:
         tables = []
         
         try:
-            doc = fitz.open(pdf_path)
-            
-            for page_num in range(len(doc)):
-                page = doc[page_num]
-                
-                # Get text blocks
-                blocks = page.get_text("dict")["blocks"]
-                
-                # Simple table detection based on alignment
-                # (This is basic - for better table extraction, use specialized libraries)
-                for block in blocks:
-                    if "lines" in block:
-                        table_data = {
-                            'page': page_num + 1,
-                            'bbox': block.get('bbox'),
-                            'text': block.get('text', '')
-                        }
-                        tables.append(table_data)
-            
-            doc.close()
+            with self.open(pdf_path) as doc:
+                for page_num in range(len(doc)):
+                    page = doc.load_page(page_num)
+                    
+                    if detect_tables and hasattr(page, 'find_tables'):
+                        for table in page.find_tables().tables:
+                            rows = table.extract()
+                            tables.append({
+                                'page': page_num + 1,
+                                'bbox': tuple(table.bbox),
+                                'text': '\n'.join('\t'.join(cell or '' for cell in row) for row in rows),
+                                'rows': rows
+                            })
+                        page = None
+                        continue
+                    
+                    # Text blocks as (x0, y0, x1, y1, text, block_no, block_type)
+                    # tuples, without building the span-level dict
+                    blocks = page.get_text("blocks", flags=_TEXT_FLAGS)
+                    page = None
+                    
+                    # Simple table detection based on alignment
+                    # (This is basic - for better table extraction, use specialized libraries)
+                    for x0, y0, x1, y1, text, _, block_type in blocks:
+                        if block_type == 0:
+                            table_data = {
+                                'page': page_num + 1,
+                                'bbox': (x0, y0, x1, y1),
+                                'text': text
+                            }
+                            tables.append(table_data)
             
             logger.info(f"Detected {len(tables)} potential table regions")
             
@@ -240,20 +473,19 @@ class PyMuPDFProcessor:
         
         return tables
     
-    def get_toc(self, pdf_path: str) -> List[Dict[str, Any]]:
+    def get_toc(self, pdf_path: PDFSource) -> List[Dict[str, Any]]:
         """
         Extract table of contents from PDF.
         
         Args:
-            pdf_path: Path to PDF file
+            pdf_path: Path to PDF file, or a document from open()
             
         Returns:
             List of TOC entries
         """
         try:
-            doc = fitz.open(pdf_path)
-            toc = doc.get_toc()
-            doc.close()
+            with self.open(pdf_path) as doc:
+                toc = doc.get_toc()
             
             # Convert to structured format
             structured_toc = []
@@ -272,36 +504,50 @@ class PyMuPDFProcessor:
             logger.error(f"Error extracting TOC: {e}")
             return []
     
-    def search_text(self, pdf_path: str, query: str) -> List[Dict[str, Any]]:
+    def search_text(self, pdf_path: PDFSource, query: str) -> List[Dict[str, Any]]:
         """
         Search for text in PDF.
         
         Args:
-            pdf_path: Path to PDF file
+            pdf_path: Path to PDF file, or a document from open()
             query: Search query
             
         Returns:
             List of search results with page numbers and positions
         """
-        results = []
+        results = self.search_many(pdf_path, [query])[query]
+        logger.info(f"Found {len(results)} instances of '{query}'")
+        return results
+    
+    def search_many(self, pdf_path: PDFSource, queries: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Search for several queries in one pass over the PDF.
         
-        try:
-            doc = fitz.open(pdf_path)
-            
-            for page_num in range(len(doc)):
-                page = doc[page_num]
-                text_instances = page.search_for(query)
-                
-                for inst in text_instances:
-                    results.append({
-                        'page': page_num + 1,
-                        'bbox': inst,
-                        'query': query
-                    })
-            
-            doc.close()
+        Each page is loaded once and searched for every query.
+        
+        Args:
+            pdf_path: Path to PDF file, or a document from open()
+            queries: Search queries
             
-            logger.info(f"Found {len(results)} instances of '{query}'")
+        Returns:
+            Dictionary mapping each query to its search results, as returned
+            by search_text
+        """
+        results = {query: [] for query in queries}
+        
+        try:
+            with self.open(pdf_path) as doc:
+                for page_num in range(len(doc)):
+                    page = doc.load_page(page_num)
+                    
+                    for query, query_results in results.items():
+                        for inst in page.search_for(query):
+                            query_results.append({
+                                'page': page_num + 1,
+                                'bbox': inst,
+                                'query': query
+                            })
+                    page = None
             
         except Exception as e:
             logger.error(f"Error searching text: {e}")
@@ -3,37 +3,269 @@ PDF Manager - Downloads and extracts text from academic PDFs
 """
 import asyncio
 import aiohttp
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
-from typing import Optional, Dict
+from typing import AsyncIterator, Optional, Dict, Tuple
 import logging
 import hashlib
+import os
 from datetime import datetime
 
+try:
+    import aiofiles  # Optional: async file writes for streamed downloads
+except ImportError:
+    aiofiles = None
+
 logger = logging.getLogger(__name__)
 
 
+# Text extraction lives at module level so PDFManager's extraction pool can
+# run it in worker processes
+
+def _extract_text_pypdf2(pdf_path: Path) -> Optional[str]:
+    """Extract text from a PDF with pypdf2"""
+    try:
+        import pypdf2
+        
+        with open(pdf_path, 'rb') as f:
+            pdf_reader = pypdf2.PdfReader(f)
+            
+            text_parts = []
+            for page_num in range(len(pdf_reader.pages)):
+                page = pdf_reader.pages[page_num]
+                text_parts.append(page.extract_text())
+            
+            full_text = "\n\n".join(text_parts)
+            logger.info(f"Extracted {len(full_text)} characters from PDF")
+            
+            return full_text
+    
+    except ImportError:
+        logger.error("pypdf2 not installed. Install with: pip install pypdf2")
+        return None
+    except Exception as e:
+        logger.error(f"Error extracting text from PDF: {e}")
+        return None
+
+
+def _extract_text_pdfplumber(pdf_path: Path) -> Optional[str]:
+    """Extract text from a PDF with pdfplumber, falling back to pypdf2"""
+    try:
+        import pdfplumber
+        
+        text_parts = []
+        with pdfplumber.open(pdf_path) as pdf:
+            for page in pdf.pages:
+                text = page.extract_text()
+                if text:
+                    text_parts.append(text)
+        
+        full_text = "\n\n".join(text_parts)
+        logger.info(f"Extracted {len(full_text)} characters from PDF (pdfplumber)")
+        
+        return full_text
+    
+    except ImportError:
+        logger.warning("pdfplumber not installed. Falling back to pypdf2. Install with: pip install pdfplumber")
+        return _extract_text_pypdf2(pdf_path)
+    except Exception as e:
+        logger.error(f"Error extracting text with pdfplumber: {e}")
+        # Fallback to pypdf2
+        return _extract_text_pypdf2(pdf_path)
+
+
+def _extract_text_pymupdf(pdf_path: Path) -> Optional[str]:
+    """Extract text from a PDF with PyMuPDF, falling back to pdfplumber"""
+    try:
+        import fitz  # PyMuPDF
+        
+        with fitz.open(pdf_path) as doc:
+            text_parts = [page.get_text("text") for page in doc]
+        
+        full_text = "\n\n".join(text_parts)
+        logger.info(f"Extracted {len(full_text)} characters from PDF (PyMuPDF)")
+        
+        return full_text
+    
+    except ImportError:
+        logger.warning("PyMuPDF not installed. Falling back to pdfplumber. Install with: pip install pymupdf")
+        return _extract_text_pdfplumber(pdf_path)
+    except Exception as e:
+        logger.error(f"Error extracting text with PyMuPDF: {e}")
+        # Fallback to pdfplumber (and from there pypdf2)
+        return _extract_text_pdfplumber(pdf_path)
+
+
 class PDFManager:
     """Manages PDF downloading and text extraction"""
     
-    def __init__(self, cache_dir: str = "./pdf_cache"):
+    # Connection pool shared by all downloads of one manager
+    MAX_CONNECTIONS = 32
+    # Bytes read from the response per write while streaming a download
+    DOWNLOAD_CHUNK_SIZE = 1 << 16
+    # Extracted texts kept in memory (by paper_id); older ones are re-read from .txt sidecars
+    TEXT_CACHE_SIZE = 256
+    
+    def __init__(self,
+                 cache_dir: str = "./pdf_cache",
+                 max_concurrency: int = 8,
+                 extract_workers: Optional[int] = None):
         """
         Initialize PDF Manager
         
         Args:
             cache_dir: Directory to cache downloaded PDFs
+            max_concurrency: Maximum number of downloads in flight at once
+                (also the connection limit per host)
+            extract_workers: Worker processes for text extraction
+                (defaults to min(CPU count, 4))
         """
         self.cache_dir = Path(cache_dir)
         self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.max_concurrency = max_concurrency
+        self.extract_workers = extract_workers or min(os.cpu_count() or 1, 4)
+        self._extract_pool: Optional[ProcessPoolExecutor] = None
+        self._text_cache: OrderedDict = OrderedDict()
+        
+        # (paper_id, revalidate, timeout) -> [download task, number of callers
+        # awaiting it], so concurrent identical requests for one paper share it
+        self._in_flight: Dict[Tuple[str, bool, int], list] = {}
+        
+        # Cached PDF filename -> (size in bytes, mtime); built on first use, see _get_index
+        self._index: Optional[Dict[str, Tuple[int, float]]] = None
+        
+        # Created lazily on the event loop that first downloads; see _get_session
+        self._session: Optional[aiohttp.ClientSession] = None
+        self._session_loop: Optional[asyncio.AbstractEventLoop] = None
+        self._semaphore: Optional[asyncio.Semaphore] = None
         
         logger.info(f"PDFManager initialized with cache: {cache_dir}")
     
+    async def _get_session(self) -> aiohttp.ClientSession:
+        """
+        Get the shared HTTP session, so connections (and TLS handshakes) are
+        reused across downloads from the same host
+        
+        A session (and the download semaphore) is bound to the event loop it
+        was created on; new ones are created when called from a different loop.
+        """
+        loop = asyncio.get_running_loop()
+        if self._session is not None and not self._session.closed:
+            if self._session_loop is loop:
+                return self._session
+            await self._close_stale_session()
+        
+        connector = aiohttp.TCPConnector(
+            limit=self.MAX_CONNECTIONS,
+            limit_per_host=self.max_concurrency,
+            ttl_dns_cache=300,
+            keepalive_timeout=60
+        )
+        self._session = aiohttp.ClientSession(
+            connector=connector,
+            timeout=aiohttp.ClientTimeout(total=60)
+        )
+        self._session_loop = loop
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+        return self._session
+    
+    async def _close_stale_session(self):
+        """
+        Close a session created on another event loop before replacing it
+        
+        Its connections belong to that loop, so they are closed there if it
+        is still running (in another thread); otherwise they are closed here,
+        or just dropped if that loop has been closed already.
+        """
+        session, session_loop = self._session, self._session_loop
+        self._session = None
+        if session_loop.is_running():
+            await asyncio.wrap_future(asyncio.run_coroutine_threadsafe(session.close(), session_loop))
+        else:
+            await session.close()
+    
+    async def close(self):
+        """
+        Close the shared HTTP session and the text extraction pool
+        
+        Only the code that owns the manager should call this: downloads still
+        in flight (whoever started them) can't finish without the session and
+        are cancelled.
+        """
+        in_flight = [task for task, _ in self._in_flight.values()]
+        for task in in_flight:
+            task.cancel()
+        if in_flight:
+            await asyncio.gather(*in_flight, return_exceptions=True)
+        if self._extract_pool is not None:
+            self._extract_pool.shutdown(wait=False)
+            self._extract_pool = None
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+        self._session_loop = None
+        self._semaphore = None
+    
     def _get_cache_path(self, paper_id: str) -> Path:
         """Get cache file path for a paper"""
         # Use paper ID hash for filename
-        filename = hashlib.md5(paper_id.encode()).hexdigest() + ".pdf"
+        filename = hashlib.blake2b(paper_id.encode(), digest_size=16).hexdigest() + ".pdf"
         return self.cache_dir / filename
     
-    async def download_pdf(self, url: str, paper_id: str, timeout: int = 30) -> Optional[Path]:
+    def _migrate_legacy_cache(self, paper_id: str, cache_path: Path) -> bool:
+        """
+        Move a PDF cached under the old MD5 filename to its current path
+        
+        Args:
+            paper_id: Unique paper identifier
+            cache_path: Current cache file path for the paper
+            
+        Returns:
+            True if a legacy file was found and moved
+        """
+        legacy_path = self.cache_dir / (hashlib.md5(paper_id.encode()).hexdigest() + ".pdf")
+        try:
+            os.replace(legacy_path, cache_path)
+        except FileNotFoundError:
+            return False
+        
+        if self._index is not None:
+            self._index.pop(legacy_path.name, None)
+        self._index_file(cache_path)
+        return True
+    
+    def _get_index(self) -> Dict[str, Tuple[int, float]]:
+        """
+        Get the in-memory index of cached PDFs, scanning the cache directory once
+        
+        Downloads and clear_cache keep the index current afterwards, so cache
+        stats and eviction don't stat every file again.
+        
+        Returns:
+            Dictionary mapping PDF filename to (size in bytes, mtime)
+        """
+        if self._index is None:
+            index = {}
+            with os.scandir(self.cache_dir) as entries:
+                for entry in entries:
+                    if entry.name.endswith('.pdf') and entry.is_file():
+                        stat = entry.stat()
+                        index[entry.name] = (stat.st_size, stat.st_mtime)
+            self._index = index
+        return self._index
+    
+    def _index_file(self, pdf_path: Path):
+        """Record a newly written cache file in the index (if it has been built)"""
+        if self._index is not None:
+            stat = pdf_path.stat()
+            self._index[pdf_path.name] = (stat.st_size, stat.st_mtime)
+    
+    async def download_pdf(self,
+                           url: str,
+                           paper_id: str,
+                           timeout: int = 30,
+                           revalidate: bool = False) -> Optional[Path]:
         """
         Download PDF from URL
         
@@ -41,41 +273,130 @@ class PDFManager:
             url: PDF download URL
             paper_id: Unique paper identifier
             timeout: Download timeout in seconds
+            revalidate: Check a cached PDF against the server with its saved
+                ETag (If-None-Match) and re-download it only if it changed
             
         Returns:
             Path to downloaded PDF or None if failed
         """
+        # Join an identical download of the same paper that is already in
+        # progress rather than fetching (and writing) the file twice; a
+        # request with other options gets a download of its own
+        key = (paper_id, revalidate, timeout)
+        entry = self._in_flight.get(key)
+        if entry is None or entry[0].get_loop() is not asyncio.get_running_loop():
+            entry = [asyncio.ensure_future(self._download_pdf(url, paper_id, timeout, revalidate)), 0]
+            self._in_flight[key] = entry
+            
+            def _done(finished: asyncio.Task, entry: list = entry):
+                if self._in_flight.get(key) is entry:
+                    del self._in_flight[key]
+            
+            entry[0].add_done_callback(_done)
+        
+        task = entry[0]
+        entry[1] += 1
+        try:
+            # Shielded so one caller being cancelled doesn't cancel the others' download
+            return await asyncio.shield(task)
+        finally:
+            entry[1] -= 1
+            if entry[1] == 0 and not task.done():
+                # Every caller has given up on it
+                task.cancel()
+    
+    async def _download_pdf(self, url: str, paper_id: str, timeout: int, revalidate: bool) -> Optional[Path]:
+        """Download (or revalidate) one PDF; see download_pdf"""
         cache_path = self._get_cache_path(paper_id)
+        etag_path = cache_path.with_suffix('.etag')
         
         # Check cache first
-        if cache_path.exists():
-            logger.info(f"PDF already cached: {paper_id}")
-            return cache_path
+        headers = {}
+        if cache_path.exists() or self._migrate_legacy_cache(paper_id, cache_path):
+            if not revalidate or not etag_path.exists():
+                logger.info(f"PDF already cached: {paper_id}")
+                return cache_path
+            headers['If-None-Match'] = etag_path.read_text().strip()
+        
+        # If revalidation fails, the cached copy is still usable
+        fallback = cache_path if headers else None
         
         try:
             logger.info(f"Downloading PDF: {url}")
             
-            async with aiohttp.ClientSession() as session:
-                async with session.get(url, timeout=aiohttp.ClientTimeout(total=timeout)) as response:
-                    if response.status == 200:
-                        content = await response.read()
+            session = await self._get_session()
+            async with self._semaphore:
+                async with session.get(url, headers=headers, timeout=aiohttp.ClientTimeout(total=timeout)) as response:
+                    if response.status == 304:
+                        logger.info(f"PDF unchanged on server: {paper_id}")
+                        return cache_path
+                    elif response.status == 200:
+                        size = await self._stream_to_cache(response, cache_path)
+                        self._index_file(cache_path)
                         
-                        # Save to cache
-                        with open(cache_path, 'wb') as f:
-                            f.write(content)
+                        etag = response.headers.get('ETag')
+                        if etag:
+                            etag_path.write_text(etag)
+                        else:
+                            etag_path.unlink(missing_ok=True)
                         
-                        logger.info(f"PDF downloaded successfully: {paper_id} ({len(content)} bytes)")
+                        if headers:
+                            # Replaced an outdated copy; its extracted text is stale too
+                            cache_path.with_suffix('.txt').unlink(missing_ok=True)
+                            self._text_cache.pop(paper_id, None)
+                        
+                        logger.info(f"PDF downloaded successfully: {paper_id} ({size} bytes)")
                         return cache_path
                     else:
                         logger.warning(f"Failed to download PDF: HTTP {response.status}")
-                        return None
+                        return fallback
         
         except asyncio.TimeoutError:
             logger.warning(f"PDF download timeout: {url}")
-            return None
+            return fallback
         except Exception as e:
             logger.error(f"Error downloading PDF: {e}")
-            return None
+            return fallback
+    
+    async def _stream_to_cache(self, response: aiohttp.ClientResponse, cache_path: Path) -> int:
+        """
+        Stream a response body into the cache without buffering it in memory
+        
+        Chunks go to a ``.part`` file that is moved into place only once the
+        body is complete, so an interrupted download never leaves a truncated
+        PDF in the cache.
+        
+        Args:
+            response: Successful HTTP response for the PDF
+            cache_path: Final cache file path
+            
+        Returns:
+            Number of bytes written
+        """
+        part_path = cache_path.with_name(f"{cache_path.name}.{os.getpid()}-{id(response)}.part")
+        size = 0
+        try:
+            if aiofiles is not None:
+                async with aiofiles.open(part_path, 'wb') as f:
+                    async for chunk in response.content.iter_chunked(self.DOWNLOAD_CHUNK_SIZE):
+                        await f.write(chunk)
+                        size += len(chunk)
+            else:
+                # Without aiofiles, keep the disk writes off the event loop in a thread
+                f = await asyncio.to_thread(open, part_path, 'wb')
+                try:
+                    async for chunk in response.content.iter_chunked(self.DOWNLOAD_CHUNK_SIZE):
+                        await asyncio.to_thread(f.write, chunk)
+                        size += len(chunk)
+                finally:
+                    await asyncio.to_thread(f.close)
+            
+            os.replace(part_path, cache_path)
+        except BaseException:
+            part_path.unlink(missing_ok=True)
+            raise
+        
+        return size
     
     def extract_text(self, pdf_path: Path) -> Optional[str]:
         """
@@ -87,28 +408,7 @@ class PDFManager:
         Returns:
             Extracted text or None if failed
         """
-        try:
-            import pypdf2
-            
-            with open(pdf_path, 'rb') as f:
-                pdf_reader = pypdf2.PdfReader(f)
-                
-                text_parts = []
-                for page_num in range(len(pdf_reader.pages)):
-                    page = pdf_reader.pages[page_num]
-                    text_parts.append(page.extract_text())
-                
-                full_text = "\n\n".join(text_parts)
-                logger.info(f"Extracted {len(full_text)} characters from PDF")
-                
-                return full_text
-        
-        except ImportError:
-            logger.error("pypdf2 not installed. Install with: pip install pypdf2")
-            return None
-        except Exception as e:
-            logger.error(f"Error extracting text from PDF: {e}")
-            return None
+        return _extract_text_pypdf2(pdf_path)
     
     def extract_text_pdfplumber(self, pdf_path: Path) -> Optional[str]:
         """
@@ -120,28 +420,43 @@ class PDFManager:
         Returns:
             Extracted text or None if failed
         """
-        try:
-            import pdfplumber
-            
-            text_parts = []
-            with pdfplumber.open(pdf_path) as pdf:
-                for page in pdf.pages:
-                    text = page.extract_text()
-                    if text:
-                        text_parts.append(text)
-            
-            full_text = "\n\n".join(text_parts)
-            logger.info(f"Extracted {len(full_text)} characters from PDF (pdfplumber)")
+        return _extract_text_pdfplumber(pdf_path)
+    
+    def extract_text_pymupdf(self, pdf_path: Path) -> Optional[str]:
+        """
+        Extract text from PDF using PyMuPDF (fastest, handles multi-column layouts)
+        
+        Falls back to pdfplumber, then pypdf2, if PyMuPDF is unavailable or fails.
+        
+        Args:
+            pdf_path: Path to PDF file
             
-            return full_text
+        Returns:
+            Extracted text or None if failed
+        """
+        return _extract_text_pymupdf(pdf_path)
+    
+    async def extract_text_async(self, pdf_path: Path) -> Optional[str]:
+        """
+        Extract text with PyMuPDF (then pdfplumber, then pypdf2) in a worker process
         
-        except ImportError:
-            logger.warning("pdfplumber not installed. Falling back to pypdf2. Install with: pip install pdfplumber")
-            return self.extract_text(pdf_path)
-        except Exception as e:
-            logger.error(f"Error extracting text with pdfplumber: {e}")
-            # Fallback to pypdf2
-            return self.extract_text(pdf_path)
+        Parsing is CPU-bound; running it in the extraction pool keeps the
+        event loop free for downloads and extracts several PDFs in parallel.
+        
+        Args:
+            pdf_path: Path to PDF file
+            
+        Returns:
+            Extracted text or None if failed
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._get_extract_pool(), _extract_text_pymupdf, pdf_path)
+    
+    def _get_extract_pool(self) -> ProcessPoolExecutor:
+        """Get the text extraction process pool, creating it on first use"""
+        if self._extract_pool is None:
+            self._extract_pool = ProcessPoolExecutor(max_workers=self.extract_workers)
+        return self._extract_pool
     
     async def get_full_text(self, paper: Dict) -> Optional[str]:
         """
@@ -160,6 +475,11 @@ class PDFManager:
             logger.warning("Paper missing PDF URL or ID")
             return None
         
+        text = self._text_cache.get(paper_id)
+        if text is not None:
+            self._text_cache.move_to_end(paper_id)
+            return text
+        
         # Download PDF
         pdf_path = await self.download_pdf(pdf_url, paper_id)
         
@@ -167,19 +487,31 @@ class PDFManager:
             logger.warning(f"Could not download PDF for paper: {paper_id}")
             return None
         
-        # Extract text (prefer pdfplumber for better quality)
-        text = self.extract_text_pdfplumber(pdf_path)
+        # Reuse text extracted on an earlier run, written next to the PDF
+        text_path = pdf_path.with_suffix('.txt')
+        try:
+            text = await asyncio.to_thread(text_path.read_text, encoding='utf-8')
+        except FileNotFoundError:
+            # Extract text (PyMuPDF first, falling back to pdfplumber and pypdf2) off the event loop
+            text = await self.extract_text_async(pdf_path)
+            if text is None:
+                return None
+            await asyncio.to_thread(text_path.write_text, text, encoding='utf-8')
+        
+        self._text_cache[paper_id] = text
+        while len(self._text_cache) > self.TEXT_CACHE_SIZE:
+            self._text_cache.popitem(last=False)
         
         return text
     
     def get_cache_stats(self) -> Dict:
         """Get statistics about the PDF cache"""
         try:
-            pdf_files = list(self.cache_dir.glob("*.pdf"))
-            total_size = sum(f.stat().st_size for f in pdf_files)
+            index = self._get_index()
+            total_size = sum(size for size, _ in index.values())
             
             return {
-                'total_pdfs': len(pdf_files),
+                'total_pdfs': len(index),
                 'total_size_mb': total_size / (1024 * 1024),
                 'cache_directory': str(self.cache_dir)
             }
@@ -199,50 +531,94 @@ class PDFManager:
             older_than_days: Only clear PDFs older than this many days (None = clear all)
         """
         try:
-            pdf_files = list(self.cache_dir.glob("*.pdf"))
+            index = self._get_index()
             removed_count = 0
             
-            for pdf_file in pdf_files:
+            for filename, (_, mtime) in list(index.items()):
                 if older_than_days:
                     # Check file age
-                    mtime = datetime.fromtimestamp(pdf_file.stat().st_mtime)
-                    age_days = (datetime.now() - mtime).days
+                    age_days = (datetime.now() - datetime.fromtimestamp(mtime)).days
                     
                     if age_days < older_than_days:
                         continue
                 
-                pdf_file.unlink()
+                pdf_file = self.cache_dir / filename
+                pdf_file.unlink(missing_ok=True)
+                del index[filename]
+                pdf_file.with_suffix('.txt').unlink(missing_ok=True)
+                pdf_file.with_suffix('.etag').unlink(missing_ok=True)
                 removed_count += 1
             
+            if removed_count:
+                self._text_cache.clear()
+            
             logger.info(f"Cleared {removed_count} PDFs from cache")
         except Exception as e:
             logger.error(f"Error clearing cache: {e}")
 
 
-async def download_papers_batch(pdf_manager: PDFManager, papers: list) -> Dict[str, str]:
+async def iter_papers_full_text(pdf_manager: Optional[PDFManager],
+                                papers: list) -> AsyncIterator[Tuple[str, Optional[str]]]:
+    """
+    Download multiple papers concurrently, yielding each as soon as it is ready
+    
+    Callers can start working on the first papers while slower downloads are
+    still in flight. The batch's own requests left pending when the caller
+    stops iterating are cancelled; to stop early, iterate inside
+    ``contextlib.aclosing`` so that happens right away.
+    
+    Args:
+        pdf_manager: PDFManager to download with (the caller stays responsible
+            for closing it), or None to use a temporary one closed afterwards
+        papers: List of paper dictionaries
+        
+    Yields:
+        (paper_id, full text or None) in completion order
+    """
+    owns_manager = pdf_manager is None
+    if owns_manager:
+        pdf_manager = PDFManager()
+    
+    tasks = {asyncio.ensure_future(pdf_manager.get_full_text(paper)): paper.get('paper_id') for paper in papers}
+    pending = set(tasks)
+    try:
+        while pending:
+            done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                paper_id = tasks[task]
+                if task.cancelled():
+                    logger.warning(f"Download of paper {paper_id} was cancelled")
+                    yield paper_id, None
+                elif task.exception() is not None:
+                    logger.error(f"Error downloading paper {paper_id}: {task.exception()}")
+                    yield paper_id, None
+                else:
+                    yield paper_id, task.result()
+    finally:
+        # Only this batch's requests; downloads shared with other callers of
+        # the manager keep running
+        for task in pending:
+            task.cancel()
+        if pending:
+            await asyncio.gather(*pending, return_exceptions=True)
+        if owns_manager:
+            await pdf_manager.close()
+
+
+async def download_papers_batch(pdf_manager: Optional[PDFManager], papers: list) -> Dict[str, str]:
     """
     Download multiple papers concurrently
     
     Args:
-        pdf_manager: PDFManager instance
+        pdf_manager: PDFManager to download with (the caller stays responsible
+            for closing it), or None to use a temporary one closed afterwards
         papers: List of paper dictionaries
         
     Returns:
         Dictionary mapping paper_id to full text
     """
-    tasks = []
-    for paper in papers:
-        task = pdf_manager.get_full_text(paper)
-        tasks.append((paper.get('paper_id'), task))
-    
     results = {}
-    completed_tasks = await asyncio.gather(*[task for _, task in tasks], return_exceptions=True)
-    
-    for (paper_id, _), result in zip(tasks, completed_tasks):
-        if isinstance(result, Exception):
-            logger.error(f"Error downloading paper {paper_id}: {result}")
-            results[paper_id] = None
-        else:
-            results[paper_id] = result
+    async for paper_id, text in iter_papers_full_text(pdf_manager, papers):
+        results[paper_id] = text
     
     return results
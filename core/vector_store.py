@@ -3,6 +3,7 @@ Vector Store Manager - Manages semantic paper search using Chroma
 """
 from typing import List, Dict, Optional
 import logging
+import uuid
 from pathlib import Path
 
 logger = logging.getLogger(__name__)
@@ -11,6 +12,9 @@ logger = logging.getLogger(__name__)
 class VectorStoreManager:
     """Manages vector storage for semantic paper search"""
     
+    # Texts sent to the embedding model per request when adding papers
+    EMBED_BATCH_SIZE = 64
+    
     def __init__(self, 
                  collection_name: str = "research_papers",
                  embedding_model: str = "nomic-embed-text",
@@ -63,13 +67,12 @@ class VectorStoreManager:
         Returns:
             List of document IDs
         """
-        from langchain_core.documents import Document
-        
         if not papers:
             logger.warning("No papers to add to vector store")
             return []
         
-        documents = []
+        contents = []
+        metadatas = []
         for paper in papers:
             # Create rich content combining title and abstract
             content = f"Title: {paper.get('title', 'Untitled')}\n\n"
@@ -87,12 +90,22 @@ class VectorStoreManager:
                 'categories': ', '.join(paper.get('categories', [])[:2])  # First 2 categories
             }
             
-            doc = Document(page_content=content, metadata=metadata)
-            documents.append(doc)
+            contents.append(content)
+            metadatas.append(metadata)
         
         try:
-            # Add documents to vector store
-            ids = self.vectorstore.add_documents(documents)
+            # Embed in batches and hand the vectors to the collection directly,
+            # one embedding request per batch instead of per document
+            collection = self.vectorstore._collection
+            ids = [str(uuid.uuid4()) for _ in contents]
+            for start in range(0, len(contents), self.EMBED_BATCH_SIZE):
+                end = start + self.EMBED_BATCH_SIZE
+                collection.upsert(
+                    ids=ids[start:end],
+                    embeddings=self.embeddings.embed_documents(contents[start:end]),
+                    documents=contents[start:end],
+                    metadatas=metadatas[start:end]
+                )
             logger.info(f"Added {len(ids)} papers to vector store")
             return ids
         except Exception as e:
@@ -154,28 +167,34 @@ class VectorStoreManager:
             List of similar papers
         """
         try:
-            # Get the reference paper
-            results = self.vectorstore.get(
-                where={'paper_id': paper_id}
+            collection = self.vectorstore._collection
+            
+            # Get the reference paper's stored embedding
+            results = collection.get(
+                where={'paper_id': paper_id},
+                limit=1,
+                include=['embeddings']
             )
             
-            if not results or not results.get('documents'):
+            embeddings = results.get('embeddings') if results else None
+            if embeddings is None or len(embeddings) == 0:
                 logger.warning(f"Paper not found in vector store: {paper_id}")
                 return []
             
-            # Search for similar content
-            similar = self.vectorstore.similarity_search(
-                results['documents'][0],
-                k=k+1  # +1 because it includes the reference paper itself
+            # Query by that vector directly instead of re-embedding the paper's text
+            similar = collection.query(
+                query_embeddings=[embeddings[0]],
+                n_results=k+1,  # +1 because it includes the reference paper itself
+                include=['documents', 'metadatas']
             )
             
             # Filter out the original paper
             similar_papers = []
-            for doc in similar:
-                if doc.metadata.get('paper_id') != paper_id:
+            for content, metadata in zip(similar['documents'][0], similar['metadatas'][0]):
+                if metadata.get('paper_id') != paper_id:
                     similar_papers.append({
-                        'content': doc.page_content,
-                        **doc.metadata
+                        'content': content,
+                        **metadata
                     })
             
             logger.info(f"Found {len(similar_papers)} similar papers to {paper_id}")
@@ -22,6 +22,14 @@ class VectorStoreConfig:
     port: Optional[int] = None  # For Milvus/Qdrant
     api_key: Optional[str] = None  # For cloud instances
     distance_metric: str = "cosine"  # 'cosine', 'l2', 'ip'
+    # Scalar quantization of stored vectors: None (full FP32) or 'int8'.
+    # Applied when a collection is created, at the cost of slightly
+    # approximate scores:
+    #   - Qdrant: int8 copies are searched in RAM (4x fewer bytes than FP32)
+    #     and the FP32 originals move to disk, read only for rescoring
+    #   - Milvus: IVF_SQ8 index, which stores only int8 vectors (4x smaller)
+    #   - ChromaDB: no quantized index; ignored with a warning
+    quantization: Optional[str] = None
     
     # Embedding settings
     embedding_base_url: str = "http://localhost:11434"
@@ -42,6 +42,9 @@ class ChromaVectorStore(BaseVectorStore):
             persist_directory=str(self.persist_directory)
         )
         
+        if config.quantization:
+            logger.warning(f"ChromaDB does not support '{config.quantization}' quantization; storing full-precision vectors")
+        
         logger.info(f"ChromaDB initialized at {self.persist_directory}")
     
     def add_papers(self, papers: List[Dict]) -> List[str]:
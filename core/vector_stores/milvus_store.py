@@ -93,10 +93,10 @@ class MilvusVectorStore(BaseVectorStore):
             schema=schema
         )
         
-        # Create index for vector field
+        # Create index for vector field (IVF_SQ8 stores int8-quantized vectors)
         index_params = {
             "metric_type": config.distance_metric.upper(),  # COSINE, L2, IP
-            "index_type": "IVF_FLAT",
+            "index_type": "IVF_SQ8" if config.quantization == 'int8' else "IVF_FLAT",
             "params": {"nlist": 128}
         }
         collection.create_index(field_name="embedding", index_params=index_params)
@@ -64,7 +64,7 @@ class QdrantVectorStore(BaseVectorStore):
     
     def _create_collection(self, config: VectorStoreConfig):
         """Create Qdrant collection with schema"""
-        from qdrant_client.models import VectorParams
+        from qdrant_client.models import VectorParams, ScalarQuantization, ScalarQuantizationConfig, ScalarType
         
         collections = self.client.get_collections().collections
         collection_names = [col.name for col in collections]
@@ -73,13 +73,24 @@ class QdrantVectorStore(BaseVectorStore):
             logger.info(f"Collection already exists: {config.collection_name}")
             return
         
+        # int8 vectors are kept in RAM for search; the originals move to disk
+        # (on_disk) and are only read to rescore the top candidates
+        quantize = config.quantization == 'int8'
+        quantization_config = None
+        if quantize:
+            quantization_config = ScalarQuantization(
+                scalar=ScalarQuantizationConfig(type=ScalarType.INT8, always_ram=True)
+            )
+        
         # Create collection
         self.client.create_collection(
             collection_name=config.collection_name,
             vectors_config=VectorParams(
                 size=config.embedding_dim,
-                distance=self.distance
-            )
+                distance=self.distance,
+                on_disk=quantize
+            ),
+            quantization_config=quantization_config
         )
         
         # Create payload indexes for filtering